@@ -79,4 +79,5 @@ setup(
         #   'rst': ['docutils>=0.11'],
         #   ':python_version=="2.6"': ['argparse'],
     },
+    entry_points={"console_scripts": ["smart-injector = smart_injector.cli:main"]},
 )
@@ -0,0 +1,6 @@
+import sys
+
+from smart_injector.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""Recommends lifetime changes from the constructions observed in a container created with ``profile=True``.
+
+.. code-block:: python
+
+    container = create_container(configure, profile=True)
+    advisor = LifetimeAdvisor(container)
+    for request in requests:
+        handle(request)
+    recommendations = advisor.recommendations(requests=len(requests))
+    container.reconfigure(lambda config: [r.apply(config) for r in recommendations])
+"""
+from typing import Any
+from typing import Dict
+from typing import List
+
+from smart_injector.config.backend import ConstructionCost
+from smart_injector.config.user import Config
+from smart_injector.container.container import StaticContainer
+from smart_injector.lifetime import Lifetime
+
+
+class Recommendation:
+    """a lifetime change proposed by :py:class:`LifetimeAdvisor`
+
+    :ivar a_type: type, whose lifetime should change
+    :ivar current: lifetime of the type during the window
+    :ivar lifetime: proposed lifetime
+    :ivar saved_seconds: estimated construction time saved per request. Negative, if the change costs time
+    :ivar saved_bytes: estimated memory released by the change
+    :ivar reason: observation, which led to the recommendation
+    """
+
+    def __init__(
+        self,
+        a_type: Any,
+        current: Lifetime,
+        lifetime: Lifetime,
+        saved_seconds: float,
+        saved_bytes: int,
+        reason: str,
+    ):
+        self.a_type = a_type
+        self.current = current
+        self.lifetime = lifetime
+        self.saved_seconds = saved_seconds
+        self.saved_bytes = saved_bytes
+        self.reason = reason
+
+    def apply(self, config: Config):
+        """sets the proposed lifetime, e.g. within :py:meth:`smart_injector.StaticContainer.reconfigure`"""
+        config.lifetime(self.a_type, self.lifetime)
+
+    def __repr__(self) -> str:
+        return "Recommendation({!r}, {} -> {}, saved_seconds={}, saved_bytes={}, reason={!r})".format(
+            self.a_type,
+            self.current.name,
+            self.lifetime.name,
+            self.saved_seconds,
+            self.saved_bytes,
+            self.reason,
+        )
+
+
+class LifetimeAdvisor:
+    """Observes the constructions of a container within a window, which starts when the advisor is created, and
+    recommends lifetime changes, which would pay off:
+
+    - transient types, which are expensive and constructed more than once per request, should be singletons
+    - large singletons, which are rarely requested, should be transient, so their memory is released after use.
+      The size of singletons is only known, if they were created while :py:mod:`tracemalloc` was tracing
+    """
+
+    def __init__(self, container: StaticContainer):
+        self._container = container
+        self.start()
+
+    def start(self):
+        """starts a new window"""
+        self._costs = self._container.construction_costs()
+        self._uses = self._container.singleton_uses()
+
+    def costs(self) -> Dict[Any, ConstructionCost]:
+        """returns the constructions per type within the window"""
+        costs = {}
+        for a_type, cost in self._container.construction_costs().items():
+            before = self._costs.get(a_type, ConstructionCost(0, 0.0))
+            if cost.count > before.count:
+                costs[a_type] = ConstructionCost(
+                    cost.count - before.count, cost.seconds - before.seconds
+                )
+        return costs
+
+    def uses(self) -> Dict[Any, int]:
+        """returns how often singletons were requested per type within the window"""
+        return {
+            a_type: count - self._uses.get(a_type, 0)
+            for a_type, count in self._container.singleton_uses().items()
+            if count > self._uses.get(a_type, 0)
+        }
+
+    def recommendations(
+        self,
+        requests: int = 1,
+        min_saved_seconds: float = 0.0001,
+        min_bytes: int = 1024 * 1024,
+        max_uses_per_request: float = 0.01,
+    ) -> List[Recommendation]:
+        """
+        :param requests: number of requests handled within the window, e.g. web requests or jobs
+        :param min_saved_seconds: minimum construction time per request a transient type must save
+        :param min_bytes: minimum size of a singleton, which should become transient
+        :param max_uses_per_request: maximum number of times such a singleton may be requested per request
+        :return: recommendations ordered by the saved time and memory
+        """
+        if requests < 1:
+            raise TypeError("requests must be at least 1")
+        costs = self.costs()
+        recommendations = self._transients(costs, requests, min_saved_seconds)
+        recommendations += self._singletons(requests, min_bytes, max_uses_per_request)
+        return sorted(
+            recommendations,
+            key=lambda r: (r.saved_seconds, r.saved_bytes),
+            reverse=True,
+        )
+
+    def _transients(
+        self, costs: Dict[Any, ConstructionCost], requests: int, min_saved_seconds: float
+    ) -> List[Recommendation]:
+        recommendations = []
+        for a_type, cost in costs.items():
+            if cost.count <= requests or not self._has_lifetime(
+                a_type, Lifetime.TRANSIENT
+            ):
+                continue
+            saved_seconds = (cost.count - 1) * cost.mean / requests
+            if saved_seconds < min_saved_seconds:
+                continue
+            recommendations.append(
+                Recommendation(
+                    a_type,
+                    Lifetime.TRANSIENT,
+                    Lifetime.SINGLETON,
+                    saved_seconds,
+                    0,
+                    "constructed {count} times in {requests} requests, {mean:.3f} ms each".format(
+                        count=cost.count, requests=requests, mean=cost.mean * 1000
+                    ),
+                )
+            )
+        return recommendations
+
+    def _singletons(
+        self, requests: int, min_bytes: int, max_uses_per_request: float
+    ) -> List[Recommendation]:
+        recommendations = []
+        uses = self.uses()
+        all_costs = self._container.construction_costs()
+        for a_type, size in self._container.stats().singleton_sizes.items():
+            used = uses.get(a_type, 0)
+            if (
+                size < min_bytes
+                or used / requests > max_uses_per_request
+                or not self._has_lifetime(a_type, Lifetime.SINGLETON)
+            ):
+                continue
+            cost = all_costs.get(a_type, ConstructionCost(0, 0.0))
+            recommendations.append(
+                Recommendation(
+                    a_type,
+                    Lifetime.SINGLETON,
+                    Lifetime.TRANSIENT,
+                    -used * cost.mean / requests,
+                    size,
+                    "keeps {size} bytes, requested {used} times in {requests} requests".format(
+                        size=size, used=used, requests=requests
+                    ),
+                )
+            )
+        return recommendations
+
+    def _has_lifetime(self, a_type: Any, lifetime: Lifetime) -> bool:
+        try:
+            return self._container.get_lifetime(a_type) is lifetime
+        except TypeError:  # not hashable
+            return False
@@ -0,0 +1,279 @@
+"""Command line interface to validate and benchmark a container.
+
+.. code-block:: text
+
+    python -m smart_injector myapp.container:configure validate
+    python -m smart_injector myapp.container:configure costs
+    python -m smart_injector myapp.container:configure singletons --top 5
+    python -m smart_injector myapp.container:configure --root myapp.api:Handler bench --number 10000
+    python -m smart_injector myapp.container:configure --root myapp.api:Handler advise --number 100
+
+Without ``--root`` all configured types are used as roots. Without any root the command fails.
+"""
+import argparse
+import sys
+import tracemalloc
+from time import perf_counter
+from typing import Any
+from typing import Callable
+from typing import List
+from typing import Optional
+from typing import TextIO
+
+from smart_injector.advisor import LifetimeAdvisor
+from smart_injector.container.container import StaticContainer
+from smart_injector.container.factory import create_container
+from smart_injector.lifetime import Lifetime
+from smart_injector.utility import import_string
+
+
+def main(argv: Optional[List[str]] = None, out: TextIO = sys.stdout) -> int:
+    """runs the command line interface
+
+    :return: exit code
+    """
+    arguments = _parser().parse_args(argv)
+    container = create_container(
+        import_string(arguments.configure),
+        default_lifetime=Lifetime[arguments.default_lifetime],
+        profile=arguments.profile,
+    )
+    roots = [import_string(root) for root in arguments.root]
+    if not roots:
+        roots = container.configured_types()
+    if not roots:
+        out.write("no types to resolve: configure types or give them with --root\n")
+        return 1
+    return arguments.command(container, roots, arguments, out)
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m smart_injector",
+        description="validate and benchmark a container",
+    )
+    parser.add_argument(
+        "configure",
+        help="configure function for the container, given as 'package.module:name'",
+    )
+    parser.add_argument(
+        "--root",
+        action="append",
+        default=[],
+        help="type to resolve, given as 'package.module:name'. Can be repeated",
+    )
+    parser.add_argument(
+        "--default-lifetime",
+        default="TRANSIENT",
+        choices=[Lifetime.SINGLETON.name, Lifetime.TRANSIENT.name],
+        help="lifetime of types without a configured lifetime",
+    )
+    commands = parser.add_subparsers(dest="command_name")
+    commands.required = True
+    commands.add_parser(
+        "validate", help="resolve every root and report errors"
+    ).set_defaults(command=_validate, profile=False)
+    commands.add_parser(
+        "costs", help="print the construction cost per type"
+    ).set_defaults(command=_costs, profile=True)
+    singletons = commands.add_parser("singletons", help="list the slowest singletons")
+    singletons.add_argument("--top", type=int, default=10)
+    singletons.set_defaults(command=_singletons, profile=True)
+    bench = commands.add_parser(
+        "bench", help="measure get() throughput and allocations for every root"
+    )
+    bench.add_argument("--number", type=int, default=10000)
+    bench.set_defaults(command=_bench, profile=False)
+    advise = commands.add_parser(
+        "advise", help="resolve every root repeatedly and recommend lifetime changes"
+    )
+    advise.add_argument("--number", type=int, default=100)
+    advise.set_defaults(command=_advise, profile=True)
+    return parser
+
+
+def _name(a_type: Any) -> str:
+    module = getattr(a_type, "__module__", None)
+    name = getattr(a_type, "__qualname__", None)
+    if module is None or name is None:
+        return repr(a_type)
+    return "{module}:{name}".format(module=module, name=name)
+
+
+def _getter(container: StaticContainer, a_type: Any) -> Callable[[], Any]:
+    """returns a function, which gets an instance of a_type. Pooled instances are returned to their pool"""
+    if container.get_lifetime(a_type) is not Lifetime.POOLED:
+        return lambda: container.get(a_type)
+
+    def acquire() -> Any:
+        with container.acquire(a_type) as instance:
+            return instance
+
+    return acquire
+
+
+def _resolve_all(
+    container: StaticContainer, roots: List[Any], out: TextIO
+) -> List[Any]:
+    """resolves every root within a scope and reports errors
+
+    :return: roots, which failed
+    """
+    failed = []
+    for root in roots:
+        try:
+            with container.scope():
+                _getter(container, root)()
+        except Exception as error:  # noqa: B902 report every error of the user's graph
+            failed.append(root)
+            _report(root, error, out)
+    return failed
+
+
+def _report(root: Any, error: Exception, out: TextIO):
+    out.write("FAILED {root}: {error!r}\n".format(root=_name(root), error=error))
+
+
+def _validate(
+    container: StaticContainer, roots: List[Any], arguments: Any, out: TextIO
+) -> int:
+    failed = _resolve_all(container, roots, out)
+    out.write(
+        "{ok} of {total} types resolved\n".format(
+            ok=len(roots) - len(failed), total=len(roots)
+        )
+    )
+    return 1 if failed else 0
+
+
+def _costs(
+    container: StaticContainer, roots: List[Any], arguments: Any, out: TextIO
+) -> int:
+    failed = _resolve_all(container, roots, out)
+    costs = sorted(
+        container.construction_costs().items(),
+        key=lambda item: item[1].seconds,
+        reverse=True,
+    )
+    out.write("{:>8} {:>12} {:>12}  type\n".format("count", "total ms", "mean ms"))
+    for a_type, cost in costs:
+        out.write(
+            "{:>8} {:>12.3f} {:>12.3f}  {}\n".format(
+                cost.count, cost.seconds * 1000, cost.mean * 1000, _name(a_type)
+            )
+        )
+    return 1 if failed else 0
+
+
+def _singletons(
+    container: StaticContainer, roots: List[Any], arguments: Any, out: TextIO
+) -> int:
+    failed = _resolve_all(container, roots, out)
+    costs = container.construction_costs()
+    singletons = sorted(
+        (
+            (costs[a_type].seconds, a_type)
+            for a_type in container.stats().singletons
+            if a_type in costs
+        ),
+        key=lambda item: item[0],
+        reverse=True,
+    )
+    out.write("{:>12}  singleton\n".format("ms"))
+    for seconds, a_type in singletons[: arguments.top]:
+        out.write("{:>12.3f}  {}\n".format(seconds * 1000, _name(a_type)))
+    return 1 if failed else 0
+
+
+def _bench(
+    container: StaticContainer, roots: List[Any], arguments: Any, out: TextIO
+) -> int:
+    failed = _resolve_all(container, roots, out)
+    out.write("{:>14} {:>16}  type\n".format("ops/sec", "bytes/call"))
+    for root in roots:
+        if root in failed:
+            continue
+        get = _getter(container, root)
+        try:
+            with container.scope():
+                start = perf_counter()
+                for _ in range(arguments.number):
+                    get()
+                seconds = perf_counter() - start
+                allocated = _allocated_per_call(get, min(arguments.number, 100))
+        except Exception as error:  # noqa: B902 report every error of the user's graph
+            failed.append(root)
+            _report(root, error, out)
+            continue
+        out.write(
+            "{:>14.0f} {:>16.0f}  {}\n".format(
+                arguments.number / seconds if seconds else float("inf"),
+                allocated,
+                _name(root),
+            )
+        )
+    return 1 if failed else 0
+
+
+def _advise(
+    container: StaticContainer, roots: List[Any], arguments: Any, out: TextIO
+) -> int:
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        failed = _resolve_all(container, roots, out)
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    getters = [(root, _getter(container, root)) for root in roots if root not in failed]
+    advisor = LifetimeAdvisor(container)
+    for _ in range(arguments.number):
+        with container.scope():
+            for root, get in list(getters):
+                try:
+                    get()
+                except Exception as error:  # noqa: B902 report every error of the user's graph
+                    getters.remove((root, get))
+                    failed.append(root)
+                    _report(root, error, out)
+    out.write("{:>12} {:>12}  {:<22} type\n".format("ms/request", "bytes", "change"))
+    for recommendation in advisor.recommendations(requests=arguments.number):
+        out.write(
+            "{:>12.3f} {:>12} {:<22} {}  ({})\n".format(
+                recommendation.saved_seconds * 1000,
+                recommendation.saved_bytes,
+                "{} -> {}".format(
+                    recommendation.current.name, recommendation.lifetime.name
+                ),
+                _name(recommendation.a_type),
+                recommendation.reason,
+            )
+        )
+    return 1 if failed else 0
+
+
+def _allocated_per_call(get: Callable[[], Any], number: int) -> float:
+    """returns the mean number of bytes allocated by a call, measured with tracemalloc"""
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        allocated = 0
+        for _ in range(number):
+            _reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            get()
+            allocated += tracemalloc.get_traced_memory()[1] - before
+        return allocated / number if number else 0.0
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+
+def _reset_peak():
+    reset_peak = getattr(tracemalloc, "reset_peak", None)  # python >= 3.9
+    if reset_peak is not None:
+        reset_peak()
+    else:
+        tracemalloc.clear_traces()
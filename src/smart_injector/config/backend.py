@@ -1,20 +1,40 @@
+import asyncio
+import functools
 import inspect
+import threading
+import weakref
 from abc import ABC
 from abc import abstractmethod
-from collections import defaultdict
+from collections import OrderedDict
+from contextlib import contextmanager
 from enum import Enum
+from time import monotonic
+from time import perf_counter
 from typing import Any
 from typing import Callable
 from typing import Dict
 from typing import Generic
+from typing import Iterator
 from typing import List
 from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import Type
 from typing import TypeVar
+from typing import Union
 from typing import cast
 
 from smart_injector.lifetime import Lifetime
+from smart_injector.lifetime import LifetimeSetting
+from smart_injector.lifetime import as_setting
 from smart_injector.resolver.resolver import Resolver
 from smart_injector.types import ConfigEntry
+from smart_injector.types import Scope
+from smart_injector.utility import Parameter
+from smart_injector.utility import dependencies
+from smart_injector.utility import import_string
+from smart_injector.utility import is_resource_factory
+from smart_injector.utility import parameters
 
 
 class ConfigVisibility(Enum):
@@ -27,13 +47,53 @@ S = TypeVar("S")
 U = TypeVar("U")
 
 
+class ConfigStats:
+    """number of entries of a :py:class:`ContextConfig`"""
+
+    def __init__(self, entries: int, context_entries: int, contexts: int, empty_contexts: int):
+        self.entries = entries
+        self.context_entries = context_entries
+        self.contexts = contexts
+        self.empty_contexts = empty_contexts
+
+    def __repr__(self) -> str:
+        return "ConfigStats(entries={}, context_entries={}, contexts={}, empty_contexts={})".format(
+            self.entries, self.context_entries, self.contexts, self.empty_contexts
+        )
+
+
+class CacheStats:
+    """size and hit rate of a cache"""
+
+    def __init__(self, size: int, hits: int, misses: int):
+        self.size = size
+        self.hits = hits
+        self.misses = misses
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __repr__(self) -> str:
+        return "CacheStats(size={}, hits={}, misses={})".format(
+            self.size, self.hits, self.misses
+        )
+
+
 class ContextConfig(Generic[U]):
+    """Configuration values for types, optionally within the context of another type.
+
+    After :py:meth:`freeze` the dictionaries are never changed in place. Changes replace them with updated copies, so
+    readers need no lock and always see a consistent state
+    """
+
     def __init__(self, default_factory: Callable[[ConfigEntry], U]):
         self._default_factory = default_factory
         self._default = {}  # type: Dict[Callable[..., T], U]
-        self._with_context = cast(
-            Dict[Callable[..., T], Dict[Callable[..., S], U]], defaultdict(dict)
-        )
+        self._with_context = {}  # type: Dict[Callable[..., T], Dict[Callable[..., S], U]]
+        self._frozen = False
+        self._lock = threading.Lock()
 
     def get_visibility(self, what: ConfigEntry) -> ConfigVisibility:
         if self.is_defined_locally(what):
@@ -42,29 +102,133 @@ class ContextConfig(Generic[U]):
             return ConfigVisibility.GLOBAL
 
     def set(self, item: ConfigEntry, to_type: U):
-        if item.where is None:
-            self._default[item.a_type] = to_type
-        else:
-            self._with_context[item.where][item.a_type] = to_type
+        with self._lock:
+            if item.where is None:
+                self._default = self._updated(self._default, item.a_type, to_type)
+            else:
+                local = self._updated(
+                    self._with_context.get(item.where, {}), item.a_type, to_type
+                )
+                self._with_context = self._updated(
+                    self._with_context, item.where, local
+                )
 
     def is_defined_locally(self, item: ConfigEntry) -> bool:
-        if item.where is not None and item.a_type in self._with_context[item.where]:
+        if item.where is not None and item.a_type in self._with_context.get(
+            item.where, {}
+        ):
             return True
         else:
             return False
 
+    def is_defined(self, item: ConfigEntry) -> bool:
+        """returns True, if a value was set for item, either within its context or globally"""
+        return self.is_defined_locally(item) or item.a_type in self._default
+
     def get(self, item: ConfigEntry) -> U:
-        if self.is_defined_locally(item):
-            return self._with_context[cast(Callable[..., T], item.where)].get(
-                item.a_type, self._default_factory(item)
-            )
-        return self._default.get(item.a_type, self._default_factory(item))
+        if item.where is not None:
+            local = self._with_context.get(item.where)
+            if local is not None and item.a_type in local:
+                return local[item.a_type]
+        try:
+            return self._default[item.a_type]
+        except KeyError:
+            return self._default_factory(item)
 
     def delete(self, item: ConfigEntry):
-        if item.where is None:
-            self._default.pop(item.a_type, cast(U, None))
-        else:
-            self._with_context[item.where].pop(item.a_type, cast(U, None))
+        with self._lock:
+            if item.where is None:
+                self._default = self._removed(self._default, item.a_type)
+            elif item.where in self._with_context:
+                local = self._removed(self._with_context[item.where], item.a_type)
+                self._with_context = self._updated(
+                    self._with_context, item.where, local
+                )
+
+    def freeze(self):
+        """from now on changes replace the dictionaries instead of changing them"""
+        self._frozen = True
+
+    def stats(self) -> ConfigStats:
+        with_context = self._with_context
+        return ConfigStats(
+            len(self._default),
+            sum(len(entries) for entries in with_context.values()),
+            len(with_context),
+            sum(1 for entries in with_context.values() if not entries),
+        )
+
+    def entries(self) -> List[Tuple[ConfigEntry, U]]:
+        """returns all configured entries with their values"""
+        entries = [
+            (ConfigEntry(a_type, None), value) for a_type, value in self._default.items()
+        ]
+        for where, local in self._with_context.items():
+            entries.extend(
+                (ConfigEntry(a_type, where), value) for a_type, value in local.items()
+            )
+        return entries
+
+    def types(self) -> List[Any]:
+        """returns the types, for which values are configured globally, and the types used as context"""
+        return list(self._default) + list(self._with_context)
+
+    def copy(self) -> "ContextConfig[U]":
+        copied = ContextConfig[U](self._default_factory)
+        copied._default = dict(self._default)
+        copied._with_context = {
+            where: dict(entries) for where, entries in self._with_context.items()
+        }
+        return copied
+
+    def _updated(self, entries: Dict[Any, Any], key: Any, value: Any) -> Dict[Any, Any]:
+        if self._frozen:
+            entries = dict(entries)
+        entries[key] = value
+        return entries
+
+    def _removed(self, entries: Dict[Any, Any], key: Any) -> Dict[Any, Any]:
+        if self._frozen:
+            entries = dict(entries)
+        entries.pop(key, None)
+        return entries
+
+
+class LazyImport:
+    """an object given as import string "package.module:name", which is imported and validated on first use"""
+
+    def __init__(self, path: str, validate: Optional[Callable[[Any], None]] = None):
+        self.path = path
+        self._validate = validate
+        self._object = None  # type: Any
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self) -> Any:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    loaded = import_string(self.path)
+                    if self._validate is not None:
+                        self._validate(loaded)
+                    self._object = loaded
+                    self._loaded = True
+        return self._object
+
+
+class AmbiguousBinding(LazyImport):
+    """binding of an interface with several implementations. Raises TypeError, when the interface is resolved"""
+
+    def __init__(self, interface: str, implementations: List[str]):
+        super().__init__(interface)
+        self.implementations = implementations
+
+    def load(self) -> Any:
+        raise TypeError(
+            "{interface} is implemented by {implementations}. Bind it explicitly".format(
+                interface=self.path, implementations=" and ".join(self.implementations)
+            )
+        )
 
 
 class ArgProxy(ABC):
@@ -122,13 +286,20 @@ def create_class_and_call_method(method: Callable[..., T], resolver: Resolver) -
 
 
 class FactoryArg(ArgProxy):
-    def __init__(self, factory: Callable[..., T]):
-        self.factory = factory
+    def __init__(self, factory: Union[Callable[..., T], LazyImport]):
+        self._factory = factory
+
+    @property
+    def factory(self) -> Callable[..., T]:
+        if isinstance(self._factory, LazyImport):
+            return self._factory.load()
+        return self._factory
 
     def get(self, resolver: Resolver) -> T:
-        if method_of_not_created_class(self.factory):
-            return create_class_and_call_method(self.factory, resolver)
-        return resolver.get_instance(self.factory)
+        factory = self.factory
+        if method_of_not_created_class(factory):
+            return create_class_and_call_method(factory, resolver)
+        return resolver.get_instance(factory)
 
 
 class FactoryArgs:
@@ -136,56 +307,188 @@ class FactoryArgs:
         self._config = ContextConfig[Dict[str, ArgProxy]](lambda x: {})
 
     def set_factory_args(self, what: ConfigEntry, kwargs: Dict[str, ArgProxy]):
-        args = self.get_factory_args(what)
+        args = dict(self.get_factory_args(what))
         args.update(kwargs)
         self._config.set(what, args)
 
     def get_factory_args(self, what: ConfigEntry) -> Dict[str, ArgProxy]:
         return self._config.get(what)
 
+    def freeze(self):
+        self._config.freeze()
+
+    def stats(self) -> ConfigStats:
+        return self._config.stats()
+
+    def types(self) -> List[Any]:
+        return self._config.types()
+
+    def copy(self) -> "FactoryArgs":
+        copied = FactoryArgs()
+        copied._config = self._config.copy()
+        return copied
+
+
+MISSING = object()
+"""returned by :py:meth:`Instances.find`, if no instance was set. Unlike None it cannot be an instance"""
+
 
 class Instances:
     def __init__(self):
-        self._config = ContextConfig[Optional[object]](lambda x: None)
+        self._config = ContextConfig[object](lambda x: MISSING)
+        self._created = cast(Set[ConfigEntry], set())
+        self._sizes = {}  # type: Dict[ConfigEntry, int]
+        self._locks = {}  # type: Dict[ConfigEntry, Any]
+        self._locks_lock = threading.Lock()
 
     def set_instance(self, what: ConfigEntry, instance: T):
         self._config.set(what, instance)
 
+    def set_created_instance(
+        self, what: ConfigEntry, instance: T, size: Optional[int] = None
+    ):
+        """set an instance created by the container, e.g. a singleton
+
+        :param size: memory in bytes allocated while creating the instance, if it was traced
+        """
+        self._config.set(what, instance)
+        self._created.add(what)
+        if size is not None:
+            self._sizes[what] = size
+
+    def is_created(self, what: ConfigEntry) -> bool:
+        """returns True, if the instance for what was created by the container"""
+        return what in self._created
+
+    def created(self) -> List[ConfigEntry]:
+        """returns the entries of all instances created by the container"""
+        return list(self._created)
+
+    def sizes(self) -> Dict[ConfigEntry, int]:
+        """returns the memory allocated while creating instances, for instances created while tracemalloc was tracing"""
+        return dict(self._sizes)
+
     def has_instance(self, what: ConfigEntry) -> bool:
-        return False if self._config.get(what) is None else True
+        return False if self._config.get(what) is MISSING else True
+
+    def find(self, what: ConfigEntry) -> object:
+        """returns the instance set for what or :py:data:`MISSING`. Instances may be None or other falsy values"""
+        return self._config.get(what)
+
+    def is_configured(self, what: ConfigEntry) -> bool:
+        """returns True, if an instance was set for what by the configuration"""
+        return self._config.is_defined(what) and not self.is_created(what)
 
     def get_instance(self, what: ConfigEntry) -> T:
         return cast(T, self._config.get(what))
 
+    def lock(self, what: ConfigEntry) -> Any:
+        """returns the lock, which must be held while creating an instance for what"""
+        with self._locks_lock:
+            if what not in self._locks:
+                self._locks[what] = threading.RLock()
+            return self._locks[what]
+
+    def freeze(self):
+        self._config.freeze()
+
+    def stats(self) -> ConfigStats:
+        return self._config.stats()
+
+    def copy(self) -> "Instances":
+        """copies the configured instances. Instances created by the container are not copied"""
+        copied = Instances()
+        copied._config = self._config.copy()
+        for what in self._created:
+            copied._config.delete(what)
+        return copied
+
 
 class Bindings:
     def __init__(self):
         self._config = ContextConfig[Callable[..., T]](lambda x: x.a_type)
+        self._members = ContextConfig[Tuple[Any, ...]](lambda x: ())
 
-    def set_binding(self, what: ConfigEntry, to_type: Callable[..., S]):
+    def set_binding(
+        self, what: ConfigEntry, to_type: Union[Callable[..., S], LazyImport]
+    ):
         self._config.set(what, to_type)
 
     def get_binding(self, which: ConfigEntry) -> Callable[..., S]:
-        return self._config.get(which)
+        binding = self._config.get(which)
+        if isinstance(binding, LazyImport):
+            return binding.load()
+        return binding
+
+    def add_member(
+        self, what: ConfigEntry, member: Union[Callable[..., S], LazyImport]
+    ):
+        """adds a member to the multibinding of what. Members for a context replace the global members"""
+        if what.where is None or self._members.is_defined_locally(what):
+            members = self._members.get(what)
+        else:
+            members = ()
+        self._members.set(what, members + (member,))
+
+    def is_bound(self, which: ConfigEntry) -> bool:
+        """returns True, if a binding or members were configured for which"""
+        return self._config.is_defined(which) or self._members.is_defined(which)
+
+    def get_members(self, which: ConfigEntry) -> List[Callable[..., S]]:
+        return [
+            member.load() if isinstance(member, LazyImport) else member
+            for member in self._members.get(which)
+        ]
+
+    def freeze(self):
+        self._config.freeze()
+        self._members.freeze()
+
+    def stats(self) -> ConfigStats:
+        return self._config.stats()
+
+    def types(self) -> List[Any]:
+        return self._config.types()
+
+    def member_stats(self) -> ConfigStats:
+        return self._members.stats()
+
+    def copy(self) -> "Bindings":
+        copied = Bindings()
+        copied._config = self._config.copy()
+        copied._members = self._members.copy()
+        return copied
 
 
 class Lifetimes:
-    def __init__(self, default_lifetime: Lifetime):
-        self._config = ContextConfig[Callable[..., T]](
-            lambda x: default_lifetime  # type: ignore
-        )
+    def __init__(self, default_lifetime: Union[Lifetime, LifetimeSetting]):
+        self._default_setting = as_setting(default_lifetime)
+        self._config = ContextConfig[LifetimeSetting](lambda x: self._default_setting)
 
     def is_singleton(self, what: ConfigEntry) -> bool:
-        return (
-            True
-            if cast(Lifetime, self._config.get(what)) is Lifetime.SINGLETON
-            else False
-        )
+        return True if self.get_lifetime(what) is Lifetime.SINGLETON else False
+
+    def eager_singletons(self) -> List[ConfigEntry]:
+        """returns the entries of singletons, which are created as soon as the container was created"""
+        return [
+            what
+            for what, setting in self._config.entries()
+            if setting.lifetime is Lifetime.SINGLETON and setting.options["eager"]
+        ]
+
+    def get_lifetime(self, what: ConfigEntry) -> Lifetime:
+        return self._config.get(what).lifetime
 
-    def set_lifetime(self, what: ConfigEntry, lifetime: Lifetime):
+    def get_setting(self, what: ConfigEntry) -> LifetimeSetting:
+        return self._config.get(what)
+
+    def set_lifetime(
+        self, what: ConfigEntry, lifetime: Union[Lifetime, LifetimeSetting]
+    ):
         self._remove_lifetime_setting(what)
-        if lifetime is not Lifetime._INTERNAL_DEFAULT:
-            self._config.set(what, lifetime)  # type: ignore
+        setting = as_setting(lifetime)
+        if setting.lifetime is not Lifetime._INTERNAL_DEFAULT:
+            self._config.set(what, setting)
 
     def _remove_lifetime_setting(self, what: ConfigEntry):
         self._config.delete(what)
@@ -193,6 +496,23 @@ class Lifetimes:
     def visibility(self, what: ConfigEntry) -> ConfigVisibility:
         return self._config.get_visibility(what)
 
+    def is_configured(self, what: ConfigEntry) -> bool:
+        return self._config.is_defined(what)
+
+    def freeze(self):
+        self._config.freeze()
+
+    def stats(self) -> ConfigStats:
+        return self._config.stats()
+
+    def types(self) -> List[Any]:
+        return self._config.types()
+
+    def copy(self) -> "Lifetimes":
+        copied = Lifetimes(self._default_setting)
+        copied._config = self._config.copy()
+        return copied
+
 
 class Dependencies:
     def __init__(self):
@@ -208,6 +528,756 @@ class Dependencies:
     def get_dependencies(self) -> Dict[Callable[..., T], None]:
         return cast(Dict[Callable[..., T], None], self._dependencies)
 
+    def copy(self) -> "Dependencies":
+        copied = Dependencies()
+        copied._dependencies = dict(self._dependencies)
+        return copied
+
+
+class InstanceCache:
+    """size bounded store of instances, which expire after their time to live"""
+
+    def __init__(
+        self,
+        ttl: Optional[float],
+        maxsize: Optional[int],
+        on_evict: Optional[Callable[[Any, object], None]] = None,
+    ):
+        """
+        :param on_evict: called with key and instance of every instance evicted because of maxsize
+        """
+        self._ttl = ttl
+        self._maxsize = maxsize
+        self._on_evict = on_evict
+        self._entries = OrderedDict()  # type: Dict[Any, Tuple[object, Optional[float]]]
+        self._lock = threading.Lock()
+
+    def lookup(self, what: Any) -> Tuple[bool, bool, Optional[object]]:
+        """returns whether an instance is cached, whether it is expired and the instance itself"""
+        with self._lock:
+            if what not in self._entries:
+                return False, False, None
+            self._entries.move_to_end(what)
+            instance, expires = self._entries[what]
+        return True, expires is not None and expires <= monotonic(), instance
+
+    def store(self, what: Any, instance: T) -> Optional[object]:
+        """stores instance for what
+
+        :return: the replaced instance or None
+        """
+        expires = None if self._ttl is None else monotonic() + self._ttl
+        evicted = []
+        with self._lock:
+            replaced = self._entries.get(what, (None, None))[0]
+            self._entries[what] = (instance, expires)
+            self._entries.move_to_end(what)
+            while self._maxsize is not None and len(self._entries) > self._maxsize:
+                key, (evicted_instance, _) = self._entries.popitem(last=False)
+                evicted.append((key, evicted_instance))
+        if self._on_evict is not None:
+            for key, evicted_instance in evicted:
+                self._on_evict(key, evicted_instance)
+        return replaced
+
+    def clear(self) -> List[object]:
+        """removes and returns all instances"""
+        with self._lock:
+            instances = [instance for instance, _ in self._entries.values()]
+            self._entries.clear()
+        return instances
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class _CachedResources(Scope):
+    """base of scopes, which keep their instances in an :py:class:`InstanceCache`. Every instance owns the resources
+    created for it, which are closed when the instance is evicted or replaced, or when the container is closed"""
+
+    def __init__(self, owners: Optional["ResourceOwners"]):
+        self._owners = owners
+        self._caches = {}  # type: Dict[LifetimeSetting, InstanceCache]
+        self._creating = threading.local()
+        self._lock = threading.Lock()
+        self._registered = False
+
+    def resource_owner(self) -> Optional["Resources"]:
+        return getattr(self._creating, "resources", None)
+
+    def _create(self, create: Callable[[], T]) -> Tuple[T, "Resources"]:
+        """creates an instance together with the resources it owns"""
+        resources = Resources()
+        previous = self.resource_owner()
+        self._creating.resources = resources
+        try:
+            instance = create()
+        except Exception:
+            _close_resources(resources)
+            raise
+        finally:
+            self._creating.resources = previous
+        if len(resources):
+            self._close_with_container()
+        return instance, resources
+
+    def _close_with_container(self):
+        if self._owners is None:
+            return
+        with self._lock:
+            if self._registered:
+                return
+            self._registered = True
+        self._owners.container.callback(self._close_all)
+
+    def _close_all(self):
+        with self._lock:
+            self._registered = False
+            caches = list(self._caches.values())
+        entries = [entry for cache in caches for entry in cache.clear()]
+        _run_all(
+            functools.partial(_close_resources, resources)
+            for _, resources in cast(List[Tuple[object, Resources]], entries)
+        )
+
+
+class CachedInstances(_CachedResources):
+    """instances with lifetime :py:attr:`smart_injector.Lifetime.CACHED`.
+
+    There is one cache for every lifetime setting, so maxsize limits all instances configured with the same setting
+    """
+
+    def __init__(self, owners: Optional["ResourceOwners"] = None):
+        """
+        :param owners: resource owners of the container, which closes the resources of the cached instances
+        """
+        super().__init__(owners)
+        self._refreshing = cast(Set[ConfigEntry], set())
+        self._locks = {}  # type: Dict[ConfigEntry, Any]
+
+    def copy(self) -> "CachedInstances":
+        return CachedInstances(self._owners)
+
+    def get(
+        self, what: ConfigEntry, setting: LifetimeSetting, create: Callable[[], T]
+    ) -> T:
+        cache = self._cache(setting)
+        cached, expired, entry = cache.lookup(what)
+        if cached and not expired:
+            return cast(T, cast(Tuple[object, Resources], entry)[0])
+        if cached and setting.options["refresh"]:
+            self._refresh_in_background(cache, what, create)
+            return cast(T, cast(Tuple[object, Resources], entry)[0])
+        with self._entry_lock(what):
+            cached, expired, entry = cache.lookup(what)
+            if cached and not expired:
+                return cast(T, cast(Tuple[object, Resources], entry)[0])
+            return self._store(cache, what, create)
+
+    def _store(self, cache: InstanceCache, what: ConfigEntry, create: Callable[[], T]) -> T:
+        instance, resources = self._create(create)
+        replaced = cache.store(what, (instance, resources))
+        if replaced is not None:
+            _close_resources(cast(Tuple[object, Resources], replaced)[1])
+        return instance
+
+    def _entry_lock(self, what: ConfigEntry) -> Any:
+        """returns the lock, which must be held while creating an instance for what"""
+        with self._lock:
+            if what not in self._locks:
+                self._locks[what] = threading.RLock()
+            return self._locks[what]
+
+    def _cache(self, setting: LifetimeSetting) -> InstanceCache:
+        with self._lock:
+            if setting not in self._caches:
+                self._caches[setting] = InstanceCache(
+                    setting.options["ttl"],
+                    setting.options["maxsize"],
+                    lambda what, entry: _close_resources(entry[1]),
+                )
+            return self._caches[setting]
+
+    def _refresh_in_background(
+        self, cache: InstanceCache, what: ConfigEntry, create: Callable[[], T]
+    ):
+        with self._lock:
+            if what in self._refreshing:
+                return
+            self._refreshing.add(what)
+        threading.Thread(
+            target=self._refresh, args=(cache, what, create), daemon=True
+        ).start()
+
+    def _refresh(self, cache: InstanceCache, what: ConfigEntry, create: Callable[[], T]):
+        try:
+            with self._entry_lock(what):
+                self._store(cache, what, create)
+        finally:
+            with self._lock:
+                self._refreshing.discard(what)
+
+
+class ThreadInstances(Scope):
+    """instances with lifetime :py:attr:`smart_injector.Lifetime.THREAD`, kept in thread local storage"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def get(
+        self, what: ConfigEntry, setting: LifetimeSetting, create: Callable[[], T]
+    ) -> T:
+        instances = self._thread().instances
+        if what not in instances:
+            instances[what] = create()
+        return cast(T, instances[what])
+
+    def copy(self) -> "ThreadInstances":
+        return ThreadInstances()
+
+    def resource_owner(self) -> "Resources":
+        return self._thread().resources
+
+    def _thread(self) -> "_ThreadInstances":
+        try:
+            return self._local.thread
+        except AttributeError:
+            self._local.thread = _ThreadInstances()
+            return self._local.thread
+
+
+class _ThreadInstances:
+    """instances of a thread. Their resources are closed, when the thread exits and its local storage is released"""
+
+    def __init__(self):
+        self.instances = {}  # type: Dict[ConfigEntry, object]
+        self.resources = Resources()
+        weakref.finalize(self, _close_resources, self.resources)
+
+
+def _close_resources(resources: "Resources"):
+    try:
+        resources.close()
+    except TypeError:  # asynchronous resources need the loop of the exited thread
+        pass
+
+
+class PartitionedInstances(_CachedResources):
+    """instances with lifetime :py:attr:`smart_injector.Lifetime.PARTITIONED`, one per partition key.
+
+    There is one size bounded cache for every lifetime setting, so maxsize limits all partitions of all types
+    configured with the same setting
+    """
+
+    def __init__(self, owners: Optional["ResourceOwners"] = None):
+        """
+        :param owners: resource owners of the container, which closes the resources of the partitions
+        """
+        super().__init__(owners)
+        self._locks = {}  # type: Dict[Tuple[ConfigEntry, Any], Any]
+
+    def copy(self) -> "PartitionedInstances":
+        return PartitionedInstances(self._owners)
+
+    def get(
+        self, what: ConfigEntry, setting: LifetimeSetting, create: Callable[[], T]
+    ) -> T:
+        key = setting.options["key"]
+        partition = (what, key.get() if hasattr(key, "get") else key())
+        cache = self._cache(setting)
+        cached, _, entry = cache.lookup(partition)
+        if cached:
+            return cast(T, cast(Tuple[object, Resources], entry)[0])
+        with self._partition_lock(partition):
+            cached, _, entry = cache.lookup(partition)
+            if cached:
+                return cast(T, cast(Tuple[object, Resources], entry)[0])
+            instance, resources = self._create(create)
+            cache.store(partition, (instance, resources))
+            return instance
+
+    def _cache(self, setting: LifetimeSetting) -> InstanceCache:
+        with self._lock:
+            if setting not in self._caches:
+                on_evict = setting.options["on_evict"]
+                self._caches[setting] = InstanceCache(
+                    None,
+                    setting.options["maxsize"],
+                    lambda partition, entry: self._evicted(partition, entry, on_evict),
+                )
+            return self._caches[setting]
+
+    def _partition_lock(self, partition: Tuple[ConfigEntry, Any]) -> Any:
+        with self._lock:
+            if partition not in self._locks:
+                self._locks[partition] = threading.RLock()
+            return self._locks[partition]
+
+    def _evicted(
+        self,
+        partition: Tuple[ConfigEntry, Any],
+        entry: Tuple[object, "Resources"],
+        on_evict: Optional[Callable[[object], None]],
+    ):
+        """calls on_evict and closes the resources of the partition. Without on_evict and resources the instance is
+        closed"""
+        with self._lock:
+            self._locks.pop(partition, None)
+        instance, resources = entry
+        if on_evict is not None:
+            on_evict(instance)
+        elif not len(resources):
+            _close(instance)
+        _close_resources(resources)
+
+
+def _close(instance: object):
+    close = getattr(instance, "close", None)
+    if callable(close):
+        close()
+
+
+class PoolMetrics:
+    """utilization of a pool at the time it was requested"""
+
+    def __init__(
+        self,
+        size: int,
+        created: int,
+        in_use: int,
+        checkouts: int,
+        waits: int,
+        wait_time: float,
+    ):
+        self.size = size
+        self.created = created
+        self.in_use = in_use
+        self.idle = created - in_use
+        self.checkouts = checkouts
+        self.waits = waits
+        self.wait_time = wait_time
+
+    @property
+    def utilization(self) -> float:
+        return self.in_use / self.size
+
+
+class Pool:
+    """bounded pool of reusable instances"""
+
+    def __init__(self, size: int, timeout: Optional[float]):
+        self._size = size
+        self._timeout = timeout
+        self._idle = []  # type: List[object]
+        self._created = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._condition = threading.Condition()
+
+    def checkout(self, create: Callable[[], T]) -> T:
+        with self._condition:
+            self._wait_for_instance()
+            self._in_use += 1
+            self._checkouts += 1
+            if self._idle:
+                return cast(T, self._idle.pop())
+            self._created += 1
+        try:
+            return create()
+        except BaseException:
+            with self._condition:
+                self._created -= 1
+                self._in_use -= 1
+                self._condition.notify()
+            raise
+
+    def _wait_for_instance(self):
+        if self._idle or self._created < self._size:
+            return
+        self._waits += 1
+        start = monotonic()
+        deadline = None if self._timeout is None else start + self._timeout
+        try:
+            while not self._idle and self._created >= self._size:
+                remaining = None if deadline is None else deadline - monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(
+                        "no instance available in pool after {timeout} seconds".format(
+                            timeout=self._timeout
+                        )
+                    )
+                self._condition.wait(remaining)
+        finally:
+            self._wait_time += monotonic() - start
+
+    def release(self, instance: T):
+        with self._condition:
+            self._idle.append(instance)
+            self._in_use -= 1
+            self._condition.notify()
+
+    def metrics(self) -> PoolMetrics:
+        with self._condition:
+            return PoolMetrics(
+                self._size,
+                self._created,
+                self._in_use,
+                self._checkouts,
+                self._waits,
+                self._wait_time,
+            )
+
+
+class Pools(Scope):
+    """instances with lifetime :py:attr:`smart_injector.Lifetime.POOLED`.
+
+    Pooled instances must be checked out with :py:meth:`.checkout` and given back to the pool they were taken from.
+    Only the requested instance is checked out, pooled dependencies of it cannot be resolved.
+    """
+
+    def __init__(self):
+        self._pools = {}  # type: Dict[ConfigEntry, Pool]
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def copy(self) -> "Pools":
+        """returns new pools, so instances are created with the new configuration. Leases of the old pools are
+        released to the pool they were taken from"""
+        return Pools()
+
+    def get(
+        self, what: ConfigEntry, setting: LifetimeSetting, create: Callable[[], T]
+    ) -> T:
+        if not getattr(self._local, "checkout_requested", False):
+            raise TypeError(
+                "{a_type} is pooled and must be acquired with StaticContainer.acquire".format(
+                    a_type=what.a_type
+                )
+            )
+        self._local.checkout_requested = False
+        pool = self._pool(what, setting)
+        instance = pool.checkout(create)
+        self._local.lease = (pool, instance)
+        return instance
+
+    def checkout(self, resolve: Callable[[], T]) -> Tuple[Pool, T]:
+        """calls resolve and returns the pool the resolved instance was checked out from"""
+        self._local.checkout_requested = True
+        self._local.lease = None
+        try:
+            instance = resolve()
+            lease = self._local.lease
+        except BaseException:
+            _release(self._local.lease)
+            raise
+        finally:
+            self._local.checkout_requested = False
+            self._local.lease = None
+        if lease is None or lease[1] is not instance:
+            _release(lease)
+            raise TypeError(
+                "{instance} was not checked out from a pool. Use Lifetime.POOLED".format(
+                    instance=instance
+                )
+            )
+        return lease
+
+    def metrics(self) -> Dict[ConfigEntry, PoolMetrics]:
+        with self._lock:
+            pools = dict(self._pools)
+        return {what: pool.metrics() for what, pool in pools.items()}
+
+    def _pool(self, what: ConfigEntry, setting: LifetimeSetting) -> Pool:
+        with self._lock:
+            if what not in self._pools:
+                self._pools[what] = Pool(
+                    setting.options["size"], setting.options["timeout"]
+                )
+            return self._pools[what]
+
+
+def _release(lease: Optional[Tuple[Pool, Any]]):
+    """gives an instance checked out by mistake, e.g. a pooled dependency, back to its pool"""
+    if lease is not None:
+        lease[0].release(lease[1])
+
+
+class Resources:
+    """cleanups of resources created by generator and context manager factories. They run in reverse order on close"""
+
+    def __init__(self):
+        self._cleanups = []  # type: List[Tuple[bool, Callable[[], Any]]]
+        self._lock = threading.Lock()
+
+    def enter(self, resource: Any, loop: Optional[asyncio.AbstractEventLoop]) -> Any:
+        """returns the value of a generator, async generator or context manager and keeps its cleanup
+
+        :param loop: event loop, on which asynchronous resources are entered
+        """
+        if inspect.isgenerator(resource):
+            value = _first_value(resource)
+            self._push(False, lambda: _finish(resource))
+        elif getattr(inspect, "isasyncgen", lambda r: False)(resource):
+            value = _run(_first_async_value(resource), loop)
+            self._push(True, lambda: _finish_async(resource))
+        elif hasattr(resource, "__enter__") and hasattr(resource, "__exit__"):
+            value = resource.__enter__()
+            self._push(False, lambda: resource.__exit__(None, None, None))
+        elif hasattr(resource, "__aenter__") and hasattr(resource, "__aexit__"):
+            value = _run(resource.__aenter__(), loop)
+            self._push(True, lambda: resource.__aexit__(None, None, None))
+        else:
+            return resource
+        return value
+
+    def close(self):
+        """runs all cleanups. Raises TypeError, if there are asynchronous cleanups"""
+        with self._lock:
+            if any(is_async for is_async, cleanup in self._cleanups):
+                raise TypeError("asynchronous resources must be closed with aclose")
+            cleanups, self._cleanups = self._cleanups, []
+        _run_all(cleanup for is_async, cleanup in reversed(cleanups))
+
+    async def aclose(self):
+        """runs all cleanups and awaits asynchronous cleanups"""
+        with self._lock:
+            cleanups, self._cleanups = self._cleanups, []
+        error = None  # type: Optional[BaseException]
+        for is_async, cleanup in reversed(cleanups):
+            try:
+                result = cleanup()
+                if is_async:
+                    await result
+            except Exception as e:  # noqa: B902 the other resources are closed, too
+                error = error or e
+        if error is not None:
+            raise error
+
+    def callback(self, cleanup: Callable[[], Any]):
+        """keeps cleanup, which runs on close like the cleanups of resources"""
+        self._push(False, cleanup)
+
+    def __len__(self) -> int:
+        return len(self._cleanups)
+
+    def _push(self, is_async: bool, cleanup: Callable[[], Any]):
+        with self._lock:
+            self._cleanups.append((is_async, cleanup))
+
+
+def _first_value(generator: Any) -> Any:
+    try:
+        return next(generator)
+    except StopIteration:
+        raise TypeError("{generator} did not yield a value".format(generator=generator))
+
+
+async def _first_async_value(generator: Any) -> Any:
+    try:
+        return await generator.__anext__()
+    except StopAsyncIteration:
+        raise TypeError("{generator} did not yield a value".format(generator=generator))
+
+
+def _finish(generator: Any):
+    try:
+        next(generator)
+    except StopIteration:
+        return
+    generator.close()
+    raise RuntimeError("{generator} must yield only once".format(generator=generator))
+
+
+async def _finish_async(generator: Any):
+    try:
+        await generator.__anext__()
+    except StopAsyncIteration:
+        return
+    await generator.aclose()
+    raise RuntimeError("{generator} must yield only once".format(generator=generator))
+
+
+def _run(coroutine: Any, loop: Optional[asyncio.AbstractEventLoop]) -> Any:
+    if loop is None:
+        coroutine.close()
+        raise TypeError(
+            "asynchronous resources must be created with StaticContainer.aget"
+        )
+    return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+
+def _run_all(cleanups: Iterator[Callable[[], Any]]):
+    error = None  # type: Optional[BaseException]
+    for cleanup in cleanups:
+        try:
+            cleanup()
+        except Exception as e:  # noqa: B902 the other resources are closed, too
+            error = error or e
+    if error is not None:
+        raise error
+
+
+class ResourceOwners:
+    """Decides, who owns a created resource: the resource scope of the current thread. Resources created for shared
+    instances (e.g. singletons) are owned by the container or the scope of their lifetime, e.g. their thread"""
+
+    def __init__(self):
+        self.container = Resources()
+        self._local = threading.local()
+
+    def enter(self, resource: Any, a_type: Any = None) -> Any:
+        """enters resource, which was created by a factory for a_type. Raises TypeError, if no scope owns it"""
+        owner = getattr(self._local, "scope", None)
+        if owner is None:
+            raise TypeError(
+                "{a_type} is a resource with transient lifetime and must be created within a scope, see "
+                "StaticContainer.scope".format(a_type=a_type)
+            )
+        return owner.enter(resource, getattr(self._local, "loop", None))
+
+    @contextmanager
+    def using(
+        self,
+        scope: Optional[Resources],
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ) -> Iterator[None]:
+        """resources created by the current thread within the context are owned by scope. Asynchronous resources are
+        entered on loop"""
+        previous = (
+            getattr(self._local, "scope", None),
+            getattr(self._local, "loop", None),
+        )
+        self._local.scope = scope
+        self._local.loop = previous[1] if loop is None else loop
+        try:
+            yield
+        finally:
+            self._local.scope, self._local.loop = previous
+
+
+class Signatures:
+    """caches the parameters and dependencies of callables, because evaluating annotations is expensive"""
+
+    def __init__(self):
+        self._parameters = {}  # type: Dict[Callable[..., Any], List[Parameter]]
+        self._dependencies = {}  # type: Dict[Callable[..., Any], Dict[str, Type[Any]]]
+        self._resource_factories = {}  # type: Dict[Callable[..., Any], bool]
+        self.hits = 0
+        self.misses = 0
+
+    def dependencies(self, a_type: Callable[..., T]) -> Dict[str, Type[Any]]:
+        try:
+            result = self._dependencies[a_type]
+            self.hits += 1
+            return result
+        except KeyError:
+            pass
+        except TypeError:  # not hashable
+            return dependencies(a_type)
+        result = {
+            parameter.name: parameter.annotation
+            for parameter in self.parameters(a_type)
+        }
+        self._dependencies[a_type] = result
+        return result
+
+    def parameters(self, a_type: Callable[..., T]) -> List[Parameter]:
+        try:
+            result = self._parameters[a_type]
+            self.hits += 1
+            return result
+        except KeyError:
+            self.misses += 1
+        except TypeError:  # not hashable
+            return parameters(a_type)
+        result = parameters(a_type)
+        self._parameters[a_type] = result
+        return result
+
+    def is_resource_factory(self, a_type: Callable[..., T]) -> bool:
+        try:
+            return self._resource_factories[a_type]
+        except KeyError:
+            pass
+        except TypeError:  # not hashable
+            return is_resource_factory(a_type)
+        result = is_resource_factory(a_type)
+        self._resource_factories[a_type] = result
+        return result
+
+    def invalidate(self, a_type: Callable[..., T]):
+        try:
+            self._parameters.pop(a_type, None)
+            self._dependencies.pop(a_type, None)
+            self._resource_factories.pop(a_type, None)
+        except TypeError:
+            pass
+
+    def __len__(self) -> int:
+        return len(self._parameters)
+
+    def stats(self) -> CacheStats:
+        return CacheStats(len(self._parameters), self.hits, self.misses)
+
+
+class ConstructionCost:
+    """number and duration of constructions of a type"""
+
+    def __init__(self, count: int, seconds: float):
+        self.count = count
+        self.seconds = seconds
+
+    @property
+    def mean(self) -> float:
+        return self.seconds / self.count if self.count else 0.0
+
+    def __repr__(self) -> str:
+        return "ConstructionCost(count={}, seconds={})".format(self.count, self.seconds)
+
+
+class ConstructionProfile:
+    """records how often and how long types are constructed. The duration includes the construction of new
+    dependencies"""
+
+    def __init__(self):
+        self._costs = {}  # type: Dict[Any, ConstructionCost]
+        self._uses = {}  # type: Dict[Any, int]
+        self._lock = threading.Lock()
+
+    def measure(self, a_type: Any, create: Callable[[], T]) -> T:
+        start = perf_counter()
+        try:
+            return create()
+        finally:
+            self.record(a_type, perf_counter() - start)
+
+    def record(self, a_type: Any, seconds: float):
+        with self._lock:
+            cost = self._costs.get(a_type)
+            if cost is None:
+                self._costs[a_type] = ConstructionCost(1, seconds)
+            else:
+                cost.count += 1
+                cost.seconds += seconds
+
+    def record_use(self, a_type: Any):
+        """records a request of an instance, which was kept by the container, e.g. a singleton"""
+        with self._lock:
+            self._uses[a_type] = self._uses.get(a_type, 0) + 1
+
+    def costs(self) -> Dict[Any, ConstructionCost]:
+        with self._lock:
+            return {
+                a_type: ConstructionCost(cost.count, cost.seconds)
+                for a_type, cost in self._costs.items()
+            }
+
+    def uses(self) -> Dict[Any, int]:
+        with self._lock:
+            return dict(self._uses)
+
 
 class ConfigBackend:
     """Simple container for all configuration classes"""
@@ -219,9 +1289,75 @@ class ConfigBackend:
         instances: Instances,
         factory_args: FactoryArgs,
         dependencies: Dependencies,
+        scopes: Optional[Dict[Lifetime, Scope]] = None,
+        signatures: Optional[Signatures] = None,
+        profile: Optional[ConstructionProfile] = None,
+        resources: Optional[ResourceOwners] = None,
     ):
         self.bindings = bindings
         self.lifetimes = lifetimes
         self.instances = instances
         self.factory_args = factory_args
         self.dependencies = dependencies
+        self.scopes = {} if scopes is None else scopes
+        self.signatures = Signatures() if signatures is None else signatures
+        self.profile = profile
+        self.resources = ResourceOwners() if resources is None else resources
+        self.epoch = 0
+        self._epoch_lock = threading.Lock()
+
+    def changed(self):
+        """called after every change of the configuration. Caches of the configuration compare the epoch"""
+        with self._epoch_lock:
+            self.epoch += 1
+
+    def freeze(self):
+        """called when the configuration is complete. Later changes do not disturb concurrent readers"""
+        self.bindings.freeze()
+        self.lifetimes.freeze()
+        self.instances.freeze()
+        self.factory_args.freeze()
+
+    def config_stats(self) -> Dict[str, ConfigStats]:
+        """returns the number of entries of all configuration stores"""
+        return {
+            "bindings": self.bindings.stats(),
+            "members": self.bindings.member_stats(),
+            "lifetimes": self.lifetimes.stats(),
+            "instances": self.instances.stats(),
+            "factory_args": self.factory_args.stats(),
+        }
+
+    def is_configured(self, what: ConfigEntry) -> bool:
+        """returns True, if what was bound, got a lifetime or an instance by the configuration"""
+        return (
+            self.bindings.is_bound(what)
+            or self.lifetimes.is_configured(what)
+            or self.instances.is_configured(what)
+        )
+
+    def configured_types(self) -> List[Any]:
+        """returns all types, which were bound, got a lifetime or arguments or are used as context"""
+        types = {}  # type: Dict[Any, None]
+        for a_type in (
+            self.bindings.types() + self.lifetimes.types() + self.factory_args.types()
+        ):
+            types[a_type] = None
+        return list(types)
+
+    def copy(self) -> "ConfigBackend":
+        """copies the configuration. Instances created by the container and scopes, which allow it, are not copied.
+        Resources of instances created with the old configuration are still closed with the container"""
+        copied = ConfigBackend(
+            self.bindings.copy(),
+            self.lifetimes.copy(),
+            self.instances.copy(),
+            self.factory_args.copy(),
+            self.dependencies.copy(),
+            {lifetime: scope.copy() for lifetime, scope in self.scopes.items()},
+            self.signatures,
+            self.profile,
+            self.resources,
+        )
+        copied.epoch = self.epoch
+        return copied
@@ -0,0 +1,227 @@
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import cast
+
+from smart_injector.config.backend import ConfigEntry
+from smart_injector.config.backend import FactoryArg
+from smart_injector.config.backend import LazyImport
+from smart_injector.config.backend import ValueArg
+from smart_injector.config.user import Config
+from smart_injector.lifetime import Lifetime
+from smart_injector.utility import import_string
+
+try:
+    import tomllib as toml_parser  # type: Any
+except ImportError:  # pragma: no cover
+    try:
+        import tomli as toml_parser
+    except ImportError:
+        toml_parser = None
+
+CACHE_VERSION = 1
+
+
+class ConfigFile:
+    """Configures a container from a TOML or JSON file. All types are given as import strings "package.module:name".
+
+    .. code-block:: toml
+
+        dependencies = ["myapp.settings:Settings"]
+
+        [[bind]]
+        type = "myapp.db:Engine"
+        to = "myapp.db.sql:SqlEngine"
+        where = "myapp.api:Handler"  # optional
+
+        [[lifetime]]
+        type = "myapp.db.sql:SqlEngine"
+        lifetime = "CACHED"
+        options = { ttl = 60 }  # optional
+
+        [[arguments]]
+        type = "myapp.db.sql:SqlEngine"
+        values = { url = "sqlite://" }
+        factories = { pool = "myapp.db:create_pool" }
+
+    After the file was validated, the result is cached in `cache_dir`. As long as neither the file nor one of the
+    modules it refers to changes, later starts apply the cached configuration without validating it again.
+    """
+
+    def __init__(self, path: str, cache_dir: Optional[str] = None):
+        self._path = os.path.abspath(path)
+        if cache_dir is None:
+            cache_dir = os.path.join(os.path.dirname(self._path), "__pycache__")
+        self._cache_path = os.path.join(
+            cache_dir, os.path.basename(self._path) + ".smart_injector.json"
+        )
+
+    def __call__(self, config: Config):
+        with open(self._path, "rb") as f:
+            content = f.read()
+        file_hash = hashlib.sha256(content).hexdigest()
+        cached = self._load_cache(file_hash)
+        if cached is not None:
+            _apply_trusted(config, cached)
+            return
+        entries = _parse(self._path, content)
+        _apply(config, entries)
+        self._store_cache(file_hash, entries)
+
+    def _load_cache(self, file_hash: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._cache_path) as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cache.get("version") != CACHE_VERSION or cache.get("hash") != file_hash:
+            return None
+        for module_file, mtime in cache["modules"].items():
+            try:
+                if os.stat(module_file).st_mtime_ns != mtime:
+                    return None
+            except OSError:
+                return None
+        return cache["entries"]
+
+    def _store_cache(self, file_hash: str, entries: Dict[str, Any]):
+        cache = {
+            "version": CACHE_VERSION,
+            "hash": file_hash,
+            "modules": _module_mtimes(entries),
+            "entries": entries,
+        }
+        try:
+            content = json.dumps(cache)
+        except (TypeError, ValueError):  # e.g. dates of toml files
+            return
+        directory = os.path.dirname(self._cache_path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(content)
+            os.replace(temp_path, self._cache_path)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+
+def load_config_file(
+    path: str, cache_dir: Optional[str] = None
+) -> Callable[[Config], None]:
+    """returns a configure function for :py:func:`smart_injector.create_container`, which applies a config file. See
+    :py:class:`ConfigFile`"""
+    return ConfigFile(path, cache_dir)
+
+
+def _parse(path: str, content: bytes) -> Dict[str, Any]:
+    if path.endswith(".toml"):
+        if toml_parser is None:
+            raise ImportError("reading toml files requires python 3.11 or tomli")
+        data = toml_parser.loads(content.decode("utf-8"))
+    else:
+        data = json.loads(content.decode("utf-8"))
+    unexpected = set(data) - {"bind", "lifetime", "arguments", "dependencies"}
+    if unexpected:
+        raise TypeError(
+            "unexpected sections {sections} in {path}".format(
+                sections=sorted(unexpected), path=path
+            )
+        )
+    return {
+        "bind": data.get("bind", []),
+        "lifetime": data.get("lifetime", []),
+        "arguments": data.get("arguments", []),
+        "dependencies": data.get("dependencies", []),
+    }
+
+
+def _where(entry: Dict[str, Any]) -> Any:
+    return None if entry.get("where") is None else import_string(entry["where"])
+
+
+def _lifetime(entry: Dict[str, Any]) -> Any:
+    return Lifetime[entry["lifetime"]](**entry.get("options", {}))
+
+
+def _apply(config: Config, entries: Dict[str, Any]):
+    """applies entries with all validations of :py:class:`smart_injector.Config`"""
+    for entry in entries["bind"]:
+        config.bind(
+            import_string(entry["type"]), import_string(entry["to"]), _where(entry)
+        )
+    for entry in entries["lifetime"]:
+        config.lifetime(import_string(entry["type"]), _lifetime(entry), _where(entry))
+    for entry in entries["arguments"]:
+        a_type = import_string(entry["type"])
+        config.arguments(a_type, _where(entry), **entry.get("values", {}))
+        config.arg_factory(
+            a_type,
+            _where(entry),
+            **{
+                name: import_string(factory)
+                for name, factory in entry.get("factories", {}).items()
+            }
+        )
+    for dependency in entries["dependencies"]:
+        config.dependency(import_string(dependency))
+
+
+def _apply_trusted(config: Config, entries: Dict[str, Any]):
+    """applies entries, which were already validated. Bound types and factories are imported on first use"""
+    backend = config._backend
+    for entry in entries["bind"]:
+        backend.bindings.set_binding(
+            ConfigEntry(import_string(entry["type"]), _where(entry)),
+            LazyImport(entry["to"]),
+        )
+    for entry in entries["lifetime"]:
+        backend.lifetimes.set_lifetime(
+            ConfigEntry(import_string(entry["type"]), _where(entry)), _lifetime(entry)
+        )
+    for entry in entries["arguments"]:
+        args = {
+            name: ValueArg(value) for name, value in entry.get("values", {}).items()
+        }
+        args.update(
+            {
+                name: FactoryArg(LazyImport(factory))
+                for name, factory in entry.get("factories", {}).items()
+            }
+        )
+        backend.factory_args.set_factory_args(
+            ConfigEntry(import_string(entry["type"]), _where(entry)), args
+        )
+    for dependency in entries["dependencies"]:
+        backend.dependencies.add_dependency(import_string(dependency))
+    backend.changed()
+
+
+def _module_mtimes(entries: Dict[str, Any]) -> Dict[str, int]:
+    paths = cast(List[str], [])
+    for section in ("bind", "lifetime", "arguments"):
+        for entry in entries[section]:
+            paths.append(entry["type"])
+            paths.extend(entry[key] for key in ("to", "where") if entry.get(key))
+            paths.extend(entry.get("factories", {}).values())
+    paths.extend(entries["dependencies"])
+    mtimes = {}
+    for path in paths:
+        module = sys.modules.get(path.partition(":")[0])
+        module_file = getattr(module, "__file__", None)
+        if module_file is not None:
+            mtimes[module_file] = os.stat(module_file).st_mtime_ns
+    return mtimes
@@ -0,0 +1,157 @@
+import importlib
+import inspect
+import json
+import os
+from importlib.util import find_spec
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import TypeVar
+
+T = TypeVar("T")
+
+INDEX_VERSION = 1
+_MARKER = "__smart_injector_injectable__"
+
+
+def injectable(cls: Callable[..., T]) -> Callable[..., T]:
+    """marks a class to be bound to its abstract base classes by :py:meth:`smart_injector.Config.scan`"""
+    setattr(cls, _MARKER, True)
+    return cls
+
+
+def _is_injectable(cls: Any, base: Optional[type]) -> bool:
+    if inspect.isabstract(cls):
+        return False
+    if vars(cls).get(_MARKER, False):
+        return True
+    return base is not None and cls is not base and issubclass(cls, base)
+
+
+def _import_path(obj: Any) -> str:
+    return "{module}:{name}".format(module=obj.__module__, name=obj.__qualname__)
+
+
+class PackageScanner:
+    """Finds injectable classes of a package and the abstract base classes they implement.
+
+    The result is stored per module in an index file. Modules which did not change since the last scan are not
+    imported again.
+    """
+
+    def __init__(
+        self, package: str, base: Optional[type] = None, index_path: Optional[str] = None
+    ):
+        self._package = package
+        self._base = None if base is None else _import_path(base)
+        self._base_type = base
+        self._index_path = index_path
+
+    def scan(self) -> List[Tuple[str, List[str]]]:
+        """
+        :return: list of injectable classes with the abstract base classes they implement, given as import strings
+        """
+        modules = self._module_files()
+        index_path = self._index_path or os.path.join(
+            self._package_dir(), "__pycache__", "smart_injector_scan.json"
+        )
+        index = self._load_index(index_path)
+        result = {}  # type: Dict[str, Dict[str, Any]]
+        for module_name, module_file in modules.items():
+            mtime = os.stat(module_file).st_mtime_ns
+            cached = index.get(module_name)
+            if cached is None or cached["file"] != module_file or cached["mtime"] != mtime:
+                cached = {
+                    "file": module_file,
+                    "mtime": mtime,
+                    "classes": self._scan_module(module_name),
+                }
+            result[module_name] = cached
+        if result != index:
+            self._store_index(index_path, result)
+        return [
+            (implementation, interfaces)
+            for module in result.values()
+            for implementation, interfaces in module["classes"]
+        ]
+
+    def _package_dir(self) -> str:
+        spec = find_spec(self._package)
+        if spec is None or not spec.submodule_search_locations:
+            raise TypeError("{package} is not a package".format(package=self._package))
+        return list(spec.submodule_search_locations)[0]
+
+    def _module_files(self) -> Dict[str, str]:
+        package_dir = self._package_dir()
+        modules = {}
+        for directory, sub_directories, files in os.walk(package_dir):
+            sub_directories[:] = [
+                sub_directory
+                for sub_directory in sorted(sub_directories)
+                if os.path.isfile(os.path.join(directory, sub_directory, "__init__.py"))
+            ]
+            relative = os.path.relpath(directory, package_dir)
+            prefix = self._package if relative == "." else ".".join(
+                [self._package] + relative.split(os.sep)
+            )
+            for file_name in sorted(files):
+                if not file_name.endswith(".py"):
+                    continue
+                name = file_name[:-3]
+                module_name = prefix if name == "__init__" else prefix + "." + name
+                modules[module_name] = os.path.join(directory, file_name)
+        return modules
+
+    def _scan_module(self, module_name: str) -> List[Tuple[str, List[str]]]:
+        module = importlib.import_module(module_name)
+        found = []
+        for cls in vars(module).values():
+            if (
+                inspect.isclass(cls)
+                and cls.__module__ == module_name
+                and _is_injectable(cls, self._base_type)
+            ):
+                interfaces = [
+                    _import_path(base)
+                    for base in inspect.getmro(cls)[1:]
+                    if inspect.isabstract(base)
+                ]
+                found.append((_import_path(cls), interfaces))
+        return found
+
+    def _load_index(self, index_path: str) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if index.get("version") != INDEX_VERSION or index.get("base") != self._base:
+            return {}
+        return {
+            name: dict(module, classes=[tuple(c) for c in module["classes"]])
+            for name, module in index["modules"].items()
+        }
+
+    def _store_index(self, index_path: str, modules: Dict[str, Dict[str, Any]]):
+        try:
+            os.makedirs(os.path.dirname(index_path), exist_ok=True)
+            with open(index_path, "w") as f:
+                json.dump(
+                    {"version": INDEX_VERSION, "base": self._base, "modules": modules}, f
+                )
+        except OSError:
+            pass
+
+
+def implementations(
+    found: List[Tuple[str, List[str]]]
+) -> Dict[str, List[str]]:
+    """returns the implementations per interface for the result of :py:meth:`PackageScanner.scan`"""
+    result = {}  # type: Dict[str, List[str]]
+    for implementation, interfaces in found:
+        for interface in interfaces:
+            result.setdefault(interface, []).append(implementation)
+    return result
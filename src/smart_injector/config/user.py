@@ -5,14 +5,25 @@ from typing import Dict
 from typing import Optional
 from typing import Type
 from typing import TypeVar
+from typing import Union
 from typing import cast
 
+from smart_injector.config.backend import AmbiguousBinding
 from smart_injector.config.backend import ConfigBackend
 from smart_injector.config.backend import FactoryArg
+from smart_injector.config.backend import LazyImport
 from smart_injector.config.backend import ValueArg
+from smart_injector.config.scan import PackageScanner
+from smart_injector.config.scan import implementations
 from smart_injector.lifetime import Lifetime
+from smart_injector.lifetime import LifetimeSetting
 from smart_injector.types import ConfigEntry
-from smart_injector.utility import get_return_type
+from smart_injector.utility import base_arguments
+from smart_injector.utility import generic_origin
+from smart_injector.utility import import_string
+from smart_injector.utility import named
+from smart_injector.utility import open_generic
+from smart_injector.utility import produced_type
 
 T = TypeVar("T")
 S = TypeVar("S")
@@ -21,9 +32,21 @@ Where = Optional[Type[T]]
 
 
 def is_base_class(base: Callable[..., T], subclass: Callable[..., S]) -> bool:
-    if base in inspect.getmro(cast(type, subclass)):
+    base_origin = generic_origin(base) or base
+    subclass_origin = generic_origin(subclass) or subclass
+    if base_origin not in inspect.getmro(cast(type, subclass_origin)):
+        return False
+    if base_origin is base:
         return True
-    return False
+    arguments = base_arguments(subclass, cast(type, base_origin))
+    if arguments is None:
+        return True
+    for expected, actual in zip(getattr(base, "__args__", ()), arguments):
+        if isinstance(expected, TypeVar) or isinstance(actual, TypeVar):
+            continue
+        if expected != actual:
+            return False
+    return True
 
 
 def ensure_subclass(a_type: Callable[..., T], to_type: Optional[Callable[..., S]]):
@@ -36,16 +59,16 @@ def ensure_subclass(a_type: Callable[..., T], to_type: Optional[Callable[..., S]
 
 
 def ensure_binding(a_type: Callable[..., T], to_type: Callable[..., S]):
-    if inspect.isclass(to_type):
+    if inspect.isclass(to_type) or generic_origin(to_type) is not None:
         ensure_subclass(a_type, to_type)
     elif callable(a_type):
-        if get_return_type(to_type) is None:
+        if produced_type(to_type) is None:
             raise TypeError(
                 "type annotation for callable {to_type} is None or is missing".format(
                     to_type=to_type
                 )
             )
-        ensure_subclass(a_type, get_return_type(to_type))
+        ensure_subclass(a_type, produced_type(to_type))
     else:
         raise TypeError("{to_type} must be callable".format(to_type=to_type))
 
@@ -62,42 +85,106 @@ class Config:
         self._backend = backend
 
     def bind(
-        self, a_type: Callable[..., T], to_type: Callable[..., S], where: Where = None
+        self,
+        a_type: Callable[..., T],
+        to_type: Union[Callable[..., S], str],
+        where: Where = None,
+        name: Optional[str] = None,
     ):
         """Specify a binding. Whenever an object of type a_type is required, then an object of type to_type will be provided.
         For example you can configure, which concrete class shall be used for an abstract base class
 
         :param a_type: will be replaced by to_type
-        :param to_type: will be used when an object of type a_type is required. to_type must be a subclass of a_type
+        :param to_type: will be used when an object of type a_type is required. to_type must be a subclass of a_type.
+            to_type can be given as import string "package.module:name". Then it is imported and checked the first time
+            a_type is resolved
         :param where:
-        :param kwargs:
+        :param name: bind only `Annotated[a_type, name]`, e.g. a parameter `engine: Annotated[Engine, "replica"]`
+
+        :return:
+
+        Generic classes can be bound for specific type arguments, e.g. `Repository[User]`, or for all type arguments,
+        e.g. `Repository[T]` (or `Repository`) to `SqlRepository[T]`. Then `Repository[User]` is resolved as
+        `SqlRepository[User]`.
+        """
+        a_type = open_generic(a_type)
+        if not isinstance(to_type, str):
+            to_type = open_generic(to_type)
+        if isinstance(to_type, str):
+            self._backend.bindings.set_binding(
+                ConfigEntry(_key(a_type, name), where),
+                LazyImport(to_type, lambda loaded: ensure_binding(a_type, loaded)),
+            )
+        else:
+            ensure_binding(a_type, to_type)
+            self._backend.signatures.invalidate(to_type)
+            self._backend.bindings.set_binding(
+                ConfigEntry(_key(a_type, name), where), to_type
+            )
+        self._backend.changed()
+
+    def add_to(
+        self,
+        a_type: Callable[..., T],
+        to_type: Union[Callable[..., S], str],
+        where: Where = None,
+    ):
+        """Add to_type to the multibinding of a_type. A parameter annotated with `List[a_type]` gets an instance of
+        every type added to a_type, in the order they were added. Each instance is resolved with its own configuration,
+        the list itself is created according to the lifetime of `List[a_type]`.
 
+        :param a_type: type of the multibinding
+        :param to_type: must be a subclass of a_type or a callable returning one. Can be an import string
+        :param where: members added within a context replace the global members for this context
         :return:
         """
-        ensure_binding(a_type, to_type)
-        self._backend.bindings.set_binding(ConfigEntry(a_type, where), to_type)
+        if isinstance(to_type, str):
+            self._backend.bindings.add_member(
+                ConfigEntry(a_type, where),
+                LazyImport(to_type, lambda loaded: ensure_binding(a_type, loaded)),
+            )
+        else:
+            ensure_binding(a_type, to_type)
+            self._backend.bindings.add_member(ConfigEntry(a_type, where), to_type)
+        self._backend.changed()
 
     def lifetime(
-        self, a_type: Callable[..., T], lifetime: Lifetime, where: Where = None
+        self,
+        a_type: Callable[..., T],
+        lifetime: Union[Lifetime, LifetimeSetting],
+        where: Where = None,
+        name: Optional[str] = None,
     ):
         """
-        Specify the lifetime for an object of type `T`. See :py:meth:`smart_injector.Lifetime`
+        Specify the lifetime for an object of type `T`. See :py:meth:`smart_injector.Lifetime`.
+        Lifetimes with options are set by calling the lifetime, e.g. ``Lifetime.CACHED(ttl=60)``
 
         :param a_type:
         :param lifetime:
         :param where:
+        :param name: set the lifetime only for `Annotated[a_type, name]`
         :return: None
 
         """
-        self._backend.lifetimes.set_lifetime(ConfigEntry(a_type, where), lifetime)
-
-    def instance(self, a_type: Callable[..., T], instance: T, where: Where = None):
+        self._backend.lifetimes.set_lifetime(
+            ConfigEntry(_key(a_type, name), where), lifetime
+        )
+        self._backend.changed()
+
+    def instance(
+        self,
+        a_type: Callable[..., T],
+        instance: T,
+        where: Where = None,
+        name: Optional[str] = None,
+    ):
         """
         set an instance of type `T` which is returned whenever an object of type `T` is requested
 
         :param a_type:
         :param instance:
         :param where:
+        :param name: set the instance only for `Annotated[a_type, name]`
         :return:
 
         """
@@ -107,7 +194,10 @@ class Config:
                     instance=instance, a_type=a_type
                 )
             )
-        self._backend.instances.set_instance(ConfigEntry(a_type, where), instance)
+        self._backend.instances.set_instance(
+            ConfigEntry(_key(a_type, name), where), instance
+        )
+        self._backend.changed()
 
     def dependency(self, a_type: Callable[..., T]):
         """
@@ -119,6 +209,7 @@ class Config:
 
         """
         self._backend.dependencies.add_dependency(a_type)
+        self._backend.changed()
 
     def arguments(self, a_type: Callable[..., T], where: Where = None, **kwargs: Any):
         """
@@ -137,14 +228,19 @@ class Config:
             ConfigEntry(a_type, where),
             {name: ValueArg(value) for name, value in kwargs.items()},
         )
+        self._backend.changed()
 
     def arg_factory(
-        self, a_type: Callable[..., T], where: Where = None, **kwargs: Callable[..., S]
+        self,
+        a_type: Callable[..., T],
+        where: Where = None,
+        **kwargs: Union[Callable[..., S], str]
     ):
         """
         In difference to :py:meth:`.arguments`:
         Instead of providing a value for `parameter` directly, `factory` is called
-        to get the value for the parameter.
+        to get the value for the parameter. A factory given as import string "package.module:name" is imported
+        when it is called the first time.
 
         :param a_type:
         :param where:
@@ -154,8 +250,50 @@ class Config:
         for parameter, factory in kwargs.items():
             ensure_parameter(a_type, parameter)
             self._backend.factory_args.set_factory_args(
-                ConfigEntry(a_type, where), {parameter: FactoryArg(factory)}
+                ConfigEntry(a_type, where),
+                {
+                    parameter: FactoryArg(
+                        LazyImport(factory) if isinstance(factory, str) else factory
+                    )
+                },
             )
+        self._backend.changed()
+
+    def scan(
+        self, package: str, base: Optional[type] = None, index_path: Optional[str] = None
+    ):
+        """
+        Bind the abstract base classes of all injectable classes found in the modules of `package` to these classes.
+        Injectable classes are marked with :py:func:`smart_injector.injectable` or are subclasses of `base`.
+        Abstract base classes with several implementations, e.g. a common base of several interfaces, are bound to
+        none of them. Resolving them raises a TypeError. Abstract base classes, which are already bound, e.g. by
+        :py:meth:`bind` or an earlier scan, keep their binding. Bind them after the scan to replace the found classes.
+
+        The result is stored in an index file (by default in the `__pycache__` directory of the package). Modules which
+        did not change since the last scan are not imported again and the found classes are imported when they are
+        resolved the first time.
+
+        :param package: name of the package
+        :param base: classes inherited from base are injectable, too
+        :param index_path: path of the index file
+        :return:
+        """
+        found = PackageScanner(package, base, index_path).scan()
+        for interface, classes in implementations(found).items():
+            entry = ConfigEntry(import_string(interface))
+            if self._backend.bindings.is_bound(entry):
+                continue
+            binding = (
+                LazyImport(classes[0])
+                if len(classes) == 1
+                else AmbiguousBinding(interface, classes)
+            )
+            self._backend.bindings.set_binding(entry, binding)
+        self._backend.changed()
+
+
+def _key(a_type: Callable[..., T], name: Optional[str]) -> Callable[..., T]:
+    return a_type if name is None else named(a_type, name)
 
 
 def ensure_arguments(a_type: Callable[..., T], kwargs: Dict[str, Any]):
@@ -1,22 +1,186 @@
+import asyncio
+import concurrent.futures
+import functools
+import inspect
+import itertools
+import sys
+import threading
+from typing import Any
 from typing import Callable
+from typing import ContextManager
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
 from typing import TypeVar
+from typing import cast
 
+from smart_injector.config.backend import CacheStats
+from smart_injector.config.backend import ConfigBackend
+from smart_injector.config.backend import ConfigEntry
+from smart_injector.config.backend import ConfigStats
+from smart_injector.config.backend import ConstructionCost
+from smart_injector.config.backend import Pool
+from smart_injector.config.backend import PoolMetrics
+from smart_injector.config.backend import Pools
+from smart_injector.config.backend import Resources
+from smart_injector.config.user import Config
+from smart_injector.lifetime import Lifetime
 from smart_injector.resolver.resolver import Resolver
+from smart_injector.types import Plan
+from smart_injector.types import ResolveRequest
+from smart_injector.types import batch
 
 T = TypeVar("T")
 S = TypeVar("S")
 
 
+class PoolLease:
+    """Context manager returned by :py:meth:`smart_injector.StaticContainer.acquire`. Usable with `with` and
+    `async with`"""
+
+    def __init__(self, checkout: Callable[[], Tuple[Pool, T]]):
+        self._checkout = checkout
+        self._lease = None  # type: Optional[Tuple[Pool, Any]]
+
+    def __enter__(self) -> Any:
+        self._lease = self._checkout()
+        return self._lease[1]
+
+    def __exit__(self, *exc_info: Any):
+        self._release()
+
+    async def __aenter__(self) -> Any:
+        loop = asyncio.get_event_loop()
+        self._lease = await loop.run_in_executor(None, self._checkout)
+        return self._lease[1]
+
+    async def __aexit__(self, *exc_info: Any):
+        self._release()
+
+    def _release(self):
+        pool, instance = cast(Tuple[Pool, Any], self._lease)
+        self._lease = None
+        pool.release(instance)
+
+
+class ResourceScope:
+    """Returned by :py:meth:`smart_injector.StaticContainer.scope`. Owns the resources of the new instances created by
+    :py:meth:`get` and :py:meth:`aget` and cleans them up on close. Usable with `with` and `async with`.
+
+    Within a `with` block the scope also owns the resources of the new instances created by the current thread in
+    any other way, e.g. by :py:meth:`smart_injector.StaticContainer.factory` or functions decorated with
+    :py:meth:`smart_injector.StaticContainer.inject`"""
+
+    def __init__(
+        self,
+        get: Callable[[Any, Optional[Resources]], Any],
+        aget: Callable[[Any, Optional[Resources]], Any],
+        using: Optional[Callable[[Resources], ContextManager[None]]] = None,
+    ):
+        self._get = get
+        self._aget = aget
+        self._using = using
+        self._resources = Resources()
+        self._entered = []  # type: List[ContextManager[None]]
+
+    def get(self, a_type: Callable[..., T]) -> T:
+        """like :py:meth:`smart_injector.StaticContainer.get`"""
+        return cast(T, self._get(a_type, self._resources))
+
+    async def aget(self, a_type: Callable[..., T]) -> T:
+        """like :py:meth:`smart_injector.StaticContainer.aget`"""
+        return cast(T, await self._aget(a_type, self._resources))
+
+    def close(self):
+        """cleans up the resources created within the scope"""
+        self._resources.close()
+
+    async def aclose(self):
+        """cleans up the resources created within the scope, including asynchronous resources"""
+        await self._resources.aclose()
+
+    def __enter__(self) -> "ResourceScope":
+        if self._using is not None:
+            using = self._using(self._resources)
+            using.__enter__()
+            self._entered.append(using)
+        return self
+
+    def __exit__(self, *exc_info: Any):
+        try:
+            if self._entered:
+                self._entered.pop().__exit__(*exc_info)
+        finally:
+            self.close()
+
+    async def __aenter__(self) -> "ResourceScope":
+        return self
+
+    async def __aexit__(self, *exc_info: Any):
+        await self.aclose()
+
+
+class ContainerStats:
+    """statistics returned by :py:meth:`smart_injector.StaticContainer.stats`
+
+    :ivar singletons: number of singletons created by the container per type
+    :ivar singleton_sizes: approximate memory in bytes allocated while creating the singletons of a type, including the
+        dependencies created with them. Only singletons created while :py:mod:`tracemalloc` was tracing are included
+    :ivar config: number of entries per configuration store
+    :ivar caches: size and hit rate per cache
+    """
+
+    def __init__(
+        self,
+        singletons: Dict[Any, int],
+        singleton_sizes: Dict[Any, int],
+        config: Dict[str, ConfigStats],
+        caches: Dict[str, CacheStats],
+    ):
+        self.singletons = singletons
+        self.singleton_sizes = singleton_sizes
+        self.config = config
+        self.caches = caches
+
+    def __repr__(self) -> str:
+        return "ContainerStats(singletons={}, singleton_sizes={}, config={}, caches={})".format(
+            self.singletons, self.singleton_sizes, self.config, self.caches
+        )
+
+
 class StaticContainer:
     """DI Container. Used by the user to get instances of types.
 
     To get your own container. Create a new class inherited from this class and override configure method
     """
 
-    def __init__(self, resolver: Resolver):
+    def __init__(
+        self,
+        resolver: Resolver,
+        backend: Optional[ConfigBackend] = None,
+        create_resolver: Optional[Callable[[ConfigBackend], Resolver]] = None,
+    ):
         """You should not create an instance of your DI container own your own. Use the factory function create_container
         instead"""
         self.__resolver = resolver
+        self.__backend = backend
+        self.__create_resolver = create_resolver
+        self.__reconfigure_lock = threading.Lock()
+        self.__plans = (
+            self.epoch,
+            resolver,
+            {},
+        )  # type: Tuple[int, Resolver, Dict[Any, Plan]]
+        self.__plan_hits = 0
+        self.__plan_misses = 0
+
+    @property
+    def epoch(self) -> int:
+        """version of the configuration. Increases whenever the configuration changes"""
+        return 0 if self.__backend is None else self.__backend.epoch
 
     def get(self, a_type: Callable[..., T]) -> T:
         """
@@ -26,3 +190,358 @@ class StaticContainer:
         :return: an instance of `T`
         """
         return self.__resolver.get_instance(a_type)
+
+    async def aget(self, a_type: Callable[..., T]) -> T:
+        """
+        Get an instance of type `T` within a coroutine. Required, if asynchronous factories (e.g. async generator
+        functions) are involved, which are run on the running event loop. The instance is resolved in a worker thread.
+
+        :param a_type: either a class `T` or a function returning a `T`
+        :return: an instance of `T`
+        """
+        return cast(T, await self.__aget(a_type, None))
+
+    def scope(self) -> ResourceScope:
+        """
+        Get a scope, which owns the resources of the new instances created within it. Resources are created by factories,
+        which are generator functions (cleanup after `yield`) or which are annotated to return a context manager.
+
+        .. code-block::
+
+            with container.scope() as scope:
+                session = scope.get(Session)
+            # the session is closed here
+
+        Within the `with` block, the scope owns the resources of all new instances created by the current thread, e.g.
+        by :py:meth:`factory`, :py:meth:`create_many` or functions decorated with :py:meth:`inject`.
+        Resources of shared instances (e.g. singletons) are owned by the container and cleaned up by :py:meth:`close`.
+
+        :return: the scope
+        """
+        if self.__backend is None:
+            return ResourceScope(self.__get_in, self.__aget)
+        return ResourceScope(
+            self.__get_in, self.__aget, self.__backend.resources.using
+        )
+
+    def close(self):
+        """cleans up the resources owned by the container"""
+        self.__resources().close()
+
+    async def aclose(self):
+        """cleans up the resources owned by the container, including asynchronous resources"""
+        await self.__resources().aclose()
+
+    def inject(self, function: Callable[..., T]) -> Callable[..., T]:
+        """
+        Decorator, which passes instances from the container to the annotated parameters of a function. Parameters with
+        default values are not injected. Arguments given by the caller are used instead of injected instances.
+
+        .. code-block::
+
+            @container.inject
+            def handle_request(request, repository: Repository):
+                ...
+
+            handle_request(request)
+
+        The parameters are inspected and resolved once on the first call.
+
+        :param function: function or coroutine function
+        :return: the decorated function
+        """
+        parameters = [None]  # type: List[Optional[List[Tuple[str, int, Any]]]]
+
+        def add_arguments(args: Tuple[Any, ...], kwargs: Dict[str, Any]):
+            injected = parameters[0]
+            if injected is None:
+                injected = parameters[0] = self.__injected_parameters(function)
+            for name, position, a_type in injected:
+                if position >= len(args) and name not in kwargs:
+                    kwargs[name] = self.__plan(a_type).build()
+
+        if inspect.iscoroutinefunction(function):
+
+            @functools.wraps(function)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                add_arguments(args, kwargs)
+                return await function(*args, **kwargs)
+
+            return cast(Callable[..., T], async_wrapper)
+
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            add_arguments(args, kwargs)
+            return function(*args, **kwargs)
+
+        return wrapper
+
+    def factory(self, a_type: Callable[..., T]) -> Callable[..., T]:
+        """
+        Get a function, which creates instances of type `T` like :py:meth:`get`, but without resolving `T` again on
+        every call. Use it to create many instances, e.g. in a loop.
+
+        .. code-block::
+
+            make_processor = container.factory(Processor)
+            processors = [make_processor(record=record) for record in records]
+
+        Keyword arguments given to the function are used instead of the injected arguments of `T`.
+
+        :param a_type: either a class `T` or a function returning a `T`
+        :return: function, which returns an instance of `T`
+        """
+
+        def make(**overrides: Any) -> T:
+            plan = self.__plan(a_type)
+            if overrides:
+                return cast(T, plan.build_with(overrides))
+            return cast(T, plan.build())
+
+        return make
+
+    def create_many(
+        self,
+        a_type: Callable[..., T],
+        n: Optional[int] = None,
+        overrides: Optional[Iterable[Dict[str, Any]]] = None,
+    ) -> List[T]:
+        """
+        Create many instances of type `T` at once. `T` is resolved once and instances shared by the container (e.g.
+        singletons) are fetched once for all instances. Only new instances are created for every instance of `T`.
+
+        .. code-block::
+
+            handlers = container.create_many(Handler, overrides=({"record": record} for record in records))
+
+        :param a_type: either a class `T` or a function returning a `T`
+        :param n: number of instances. If overrides are given too, at most n instances are created
+        :param overrides: keyword arguments per instance, which are used instead of injected arguments
+        :return: list of instances of `T`
+        """
+        return list(self.iter_many(a_type, n, overrides))
+
+    def iter_many(
+        self,
+        a_type: Callable[..., T],
+        n: Optional[int] = None,
+        overrides: Optional[Iterable[Dict[str, Any]]] = None,
+    ) -> Iterator[T]:
+        """
+        Like :py:meth:`create_many`, but instances are created one by one, while the returned iterator is consumed.
+        Use it for streams of input, e.g. to create one handler per record.
+        """
+        if n is None and overrides is None:
+            raise TypeError("either n or overrides must be given")
+        plan = batch(self.__plan(a_type))
+        if overrides is None:
+            items = itertools.repeat({}, n)  # type: Iterable[Dict[str, Any]]
+        elif n is None:
+            items = overrides
+        else:
+            items = itertools.islice(overrides, n)
+        return (plan.build_with(item) if item else plan.build() for item in items)
+
+    def acquire(self, a_type: Callable[..., T]) -> PoolLease:
+        """
+        Check out an instance of type `T` from its pool. `T` must have lifetime :py:attr:`smart_injector.Lifetime.POOLED`.
+        If all instances of the pool are in use, waits until an instance is returned to the pool.
+
+        .. code-block::
+
+            with container.acquire(Parser) as parser:
+                parser.parse(data)
+
+        :param a_type: either a class `T` or a function returning a `T`
+        :return: a context manager, which returns the instance to the pool on exit
+        """
+        pools = self.__pools()
+        return PoolLease(lambda: pools.checkout(lambda: self.get(a_type)))
+
+    def reconfigure(self, configure: Callable[[Config], None]):
+        """
+        Change the configuration of the container. All changes made by `configure` are applied at once: concurrent calls
+        of :py:meth:`get` use either the old or the new configuration.
+
+        Instances created by the container (e.g. singletons) are created again with the new configuration. Instances set
+        with :py:meth:`smart_injector.Config.instance` and given dependencies are kept.
+
+        :param configure: function, which takes a :py:class:`smart_injector.Config`
+        :return:
+        """
+        if self.__backend is None or self.__create_resolver is None:
+            raise TypeError("container cannot be reconfigured")
+        with self.__reconfigure_lock:
+            backend = self.__backend.copy()
+            configure(Config(backend))
+            if backend.dependencies.get_dependencies():
+                raise TypeError(
+                    "dependencies {dependencies} cannot be declared after the container was created".format(
+                        dependencies=list(backend.dependencies.get_dependencies())
+                    )
+                )
+            backend.freeze()
+            backend.epoch = self.__backend.epoch + 1
+            self.__resolver = self.__create_resolver(backend)
+            self.__backend = backend
+        self.start_eager_singletons()
+
+    def start_eager_singletons(self) -> List["concurrent.futures.Future[Any]"]:
+        """
+        Start to create all singletons with lifetime ``Lifetime.SINGLETON(eager=True)`` in background threads. Called by
+        :py:func:`smart_injector.create_container` and :py:meth:`reconfigure`. A call of :py:meth:`get` for a singleton,
+        which is being created, waits for it. Singletons, which were not created yet, are created by `get` as usual.
+
+        :return: futures of the creations. Errors are raised again by `get`
+        """
+        if self.__backend is None:
+            return []
+        entries = self.__backend.lifetimes.eager_singletons()
+        if not entries:
+            return []
+        resolver = self.__resolver
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(len(entries), 4)
+        )
+        try:
+            return [
+                executor.submit(
+                    resolver.get_new_instance,
+                    ResolveRequest(entry.a_type, entry.a_type, entry.where),
+                )
+                for entry in entries
+            ]
+        finally:
+            executor.shutdown(wait=False)
+
+    def pool_metrics(self) -> Dict[ConfigEntry, PoolMetrics]:
+        """
+        :return: utilization of all pools created so far
+        """
+        return self.__pools().metrics()
+
+    def stats(self) -> ContainerStats:
+        """
+        :return: number of created singletons, configuration entries and cache statistics. Use it to check, whether the
+            container retains more objects than expected
+        """
+        if self.__backend is None:
+            raise TypeError("container does not provide statistics")
+        backend = self.__backend
+        singletons = {}  # type: Dict[Any, int]
+        for entry in backend.instances.created():
+            singletons[entry.a_type] = singletons.get(entry.a_type, 0) + 1
+        singleton_sizes = {}  # type: Dict[Any, int]
+        for entry, size in backend.instances.sizes().items():
+            singleton_sizes[entry.a_type] = singleton_sizes.get(entry.a_type, 0) + size
+        return ContainerStats(
+            singletons,
+            singleton_sizes,
+            backend.config_stats(),
+            {
+                "signatures": backend.signatures.stats(),
+                "plans": CacheStats(
+                    len(self.__plans[2]), self.__plan_hits, self.__plan_misses
+                ),
+            },
+        )
+
+    def construction_costs(self) -> Dict[Any, ConstructionCost]:
+        """
+        :return: how often and how long types were constructed. Requires a container created with `profile=True`
+        """
+        if self.__backend is None or self.__backend.profile is None:
+            raise TypeError("container was not created with profile=True")
+        return self.__backend.profile.costs()
+
+    def singleton_uses(self) -> Dict[Any, int]:
+        """
+        :return: how often singletons were requested per type. Requires a container created with `profile=True`
+        """
+        if self.__backend is None or self.__backend.profile is None:
+            raise TypeError("container was not created with profile=True")
+        return self.__backend.profile.uses()
+
+    def configured_types(self) -> List[Any]:
+        """
+        :return: types, which were bound, got a lifetime or arguments or are used as context
+        """
+        return [] if self.__backend is None else self.__backend.configured_types()
+
+    def get_lifetime(self, a_type: Callable[..., T]) -> Lifetime:
+        """
+        :return: the lifetime of instances of type `T`
+        """
+        if self.__backend is None:
+            raise TypeError("container has no configuration")
+        return self.__backend.lifetimes.get_lifetime(ConfigEntry(a_type))
+
+    def __resources(self) -> Resources:
+        if self.__backend is None:
+            raise TypeError("container does not support resources")
+        return self.__backend.resources.container
+
+    def __get_in(
+        self,
+        a_type: Callable[..., T],
+        scope: Optional[Resources],
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ) -> T:
+        if self.__backend is None:
+            return self.get(a_type)
+        with self.__backend.resources.using(scope, loop):
+            return self.get(a_type)
+
+    async def __aget(self, a_type: Callable[..., T], scope: Optional[Resources]) -> T:
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(self.__get_in, a_type, scope, loop)
+        )
+
+    def __plan(self, a_type: Callable[..., T]) -> Plan:
+        epoch, resolver, plans = self.__plans
+        if epoch != self.epoch or resolver is not self.__resolver:
+            epoch, resolver, plans = self.epoch, self.__resolver, {}
+            self.__plans = (epoch, resolver, plans)
+        try:
+            plan = plans[a_type]
+            self.__plan_hits += 1
+            return plan
+        except KeyError:
+            self.__plan_misses += 1
+        plan = resolver.compile(ResolveRequest(a_type, a_type, None))
+        plans[a_type] = plan
+        return plan
+
+    def __injected_parameters(
+        self, function: Callable[..., T]
+    ) -> List[Tuple[str, int, Any]]:
+        """returns name, position and type of the parameters to inject"""
+        hints = (
+            {}
+            if self.__backend is None
+            else self.__backend.signatures.dependencies(function)
+        )
+        injected = []
+        for position, parameter in enumerate(
+            inspect.signature(function).parameters.values()
+        ):
+            if parameter.kind in (parameter.VAR_POSITIONAL, parameter.VAR_KEYWORD):
+                continue
+            if parameter.kind is parameter.KEYWORD_ONLY:
+                position = sys.maxsize
+            a_type = hints.get(parameter.name, parameter.annotation)
+            if a_type is parameter.empty or parameter.default is not parameter.empty:
+                continue
+            injected.append((parameter.name, position, a_type))
+        return injected
+
+    def __pools(self) -> Pools:
+        if self.__backend is None or Lifetime.POOLED not in self.__backend.scopes:
+            raise TypeError("container does not support pooled instances")
+        return cast(Pools, self.__backend.scopes[Lifetime.POOLED])
+
+
+def inject(container: StaticContainer) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """returns a decorator, which injects instances of `container`. See :py:meth:`StaticContainer.inject`"""
+    return container.inject
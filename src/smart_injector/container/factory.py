@@ -1,32 +1,48 @@
 from typing import Callable
+from typing import Dict
 from typing import List
 from typing import Optional
 
 from smart_injector.config.backend import Bindings
+from smart_injector.config.backend import CachedInstances
 from smart_injector.config.backend import ConfigBackend
 from smart_injector.config.backend import ConfigEntry
+from smart_injector.config.backend import ConstructionProfile
 from smart_injector.config.backend import Dependencies
 from smart_injector.config.backend import FactoryArgs
 from smart_injector.config.backend import Instances
 from smart_injector.config.backend import Lifetimes
+from smart_injector.config.backend import PartitionedInstances
+from smart_injector.config.backend import Pools
+from smart_injector.config.backend import ResourceOwners
+from smart_injector.config.backend import ThreadInstances
+from smart_injector.config.file import ConfigFile
 from smart_injector.config.user import Config
 from smart_injector.container.container import StaticContainer
 from smart_injector.lifetime import Lifetime
 from smart_injector.resolver.handlers import AbstractTypeHandler
 from smart_injector.resolver.handlers import BindingHandler
 from smart_injector.resolver.handlers import BuiltinsTypeHandler
+from smart_injector.resolver.handlers import GenericTypeHandler
 from smart_injector.resolver.handlers import InstanceFactory
 from smart_injector.resolver.handlers import InstanceHandler
+from smart_injector.resolver.handlers import NamedTypeHandler
 from smart_injector.resolver.handlers import NewInstanceHandler
+from smart_injector.resolver.handlers import OptionalTypeHandler
+from smart_injector.resolver.handlers import ScopedBaseTypeHandler
+from smart_injector.resolver.handlers import ScopedEffectiveHandler
 from smart_injector.resolver.handlers import SingletonBaseTypeHandler
 from smart_injector.resolver.handlers import SingletonEffectiveHandler
 from smart_injector.resolver.resolver import Resolver
+from smart_injector.types import Scope
 
 
 def create_container(
     configure: Optional[Callable[[Config], None]] = None,
     default_lifetime=Lifetime.TRANSIENT,
     dependencies: Optional[List[object]] = None,
+    config_file: Optional[str] = None,
+    profile: bool = False,
 ) -> StaticContainer:
     """
     Use this function to create a DI container.
@@ -34,6 +50,10 @@ def create_container(
     :param configure:
     :param default_lifetime:
     :param dependencies:
+    :param config_file: path of a TOML or JSON file, see :py:class:`smart_injector.config.file.ConfigFile`. It is
+        applied before `configure`
+    :param profile: record how often and how long types are constructed, see
+        :py:meth:`smart_injector.StaticContainer.construction_costs`
     :return:
     """
     if configure is None:
@@ -41,13 +61,92 @@ def create_container(
     if dependencies is None:
         dependencies = []
     backend = _create_backend(default_lifetime)
+    if profile:
+        backend.profile = ConstructionProfile()
     resolver = _create_resolver(backend)
-    container = StaticContainer(resolver=resolver)
-    configure(Config(backend=backend))
+    container = StaticContainer(
+        resolver=resolver, backend=backend, create_resolver=_create_resolver
+    )
+    config = Config(backend=backend)
+    if config_file is not None:
+        ConfigFile(config_file)(config)
+    configure(config)
     _resolve_dependencies(backend, dependencies)
+    backend.freeze()
+    container.start_eager_singletons()
     return container
 
 
+class ContainerTemplate:
+    """A validated configuration, from which many containers are created cheaply. Returned by
+    :py:func:`compile_container`"""
+
+    def __init__(self, backend: ConfigBackend):
+        self._backend = backend
+
+    def instantiate(self, dependencies: Optional[List[object]] = None) -> StaticContainer:
+        """
+        Create a new container with the configuration of the template. The configuration is not validated again and is
+        shared with the other containers of the template. Each container has its own singletons, scopes and resources.
+
+        :param dependencies: instances for the dependencies declared by the configuration
+        :return: the container
+        """
+        template = self._backend
+        resources = ResourceOwners()
+        backend = ConfigBackend(
+            template.bindings,
+            template.lifetimes,
+            template.instances.copy(),
+            template.factory_args,
+            template.dependencies.copy(),
+            _create_scopes(resources),
+            template.signatures,
+            None if template.profile is None else ConstructionProfile(),
+            resources,
+        )
+        backend.epoch = template.epoch
+        _resolve_dependencies(backend, [] if dependencies is None else dependencies)
+        backend.freeze()
+        container = StaticContainer(
+            resolver=_create_resolver(backend),
+            backend=backend,
+            create_resolver=_create_resolver,
+        )
+        container.start_eager_singletons()
+        return container
+
+
+def compile_container(
+    configure: Optional[Callable[[Config], None]] = None,
+    default_lifetime=Lifetime.TRANSIENT,
+    config_file: Optional[str] = None,
+    profile: bool = False,
+) -> ContainerTemplate:
+    """
+    Configure and validate a container once to create many containers with the same configuration, e.g. one per
+    tenant. The parameters are the same as for :py:func:`create_container`.
+
+    .. code-block::
+
+        template = compile_container(configure)
+        container = template.instantiate(dependencies=[tenant_settings])
+
+    :return: the template
+    """
+    if configure is None:
+        configure = _default_config
+    backend = _create_backend(default_lifetime)
+    if profile:
+        backend.profile = ConstructionProfile()
+    config = Config(backend=backend)
+    if config_file is not None:
+        ConfigFile(config_file)(config)
+    configure(config)
+    backend.freeze()
+    return ContainerTemplate(backend)
+
+
 def _default_config(config: Config):
     pass
 
@@ -58,14 +157,43 @@ def _create_backend(default_lifetime: Lifetime) -> ConfigBackend:
     bindings = Bindings()
     factory_args = FactoryArgs()
     _dependencies = Dependencies()
-    return ConfigBackend(bindings, lifetimes, instances, factory_args, _dependencies)
+    resources = ResourceOwners()
+    return ConfigBackend(
+        bindings,
+        lifetimes,
+        instances,
+        factory_args,
+        _dependencies,
+        _create_scopes(resources),
+        resources=resources,
+    )
+
+
+def _create_scopes(resources: ResourceOwners) -> Dict[Lifetime, Scope]:
+    return {
+        Lifetime.CACHED: CachedInstances(resources),
+        Lifetime.POOLED: Pools(),
+        Lifetime.THREAD: ThreadInstances(),
+        Lifetime.PARTITIONED: PartitionedInstances(resources),
+    }
 
 
 def _create_resolver(backend: ConfigBackend):
     resolver = Resolver()
-    instance_factory = InstanceFactory(resolver, backend.factory_args)
-    resolver.add_type_handler(InstanceHandler(backend.instances))
+    instance_factory = InstanceFactory(
+        resolver,
+        backend.factory_args,
+        backend.signatures,
+        backend.bindings,
+        backend.profile,
+        backend.resources,
+        backend.is_configured,
+    )
+    resolver.add_type_handler(InstanceHandler(backend.instances, backend.profile))
     resolver.add_type_handler(BindingHandler(resolver, backend.bindings))
+    resolver.add_type_handler(NamedTypeHandler(resolver))
+    resolver.add_type_handler(OptionalTypeHandler(resolver, backend.is_configured))
+    resolver.add_type_handler(GenericTypeHandler(resolver, backend.bindings))
     resolver.add_type_handler(
         SingletonBaseTypeHandler(backend.lifetimes, backend.instances, instance_factory)
     )
@@ -74,6 +202,12 @@ def _create_resolver(backend: ConfigBackend):
             backend.lifetimes, backend.instances, instance_factory
         )
     )
+    resolver.add_type_handler(
+        ScopedBaseTypeHandler(backend.lifetimes, backend.scopes, instance_factory)
+    )
+    resolver.add_type_handler(
+        ScopedEffectiveHandler(backend.lifetimes, backend.scopes, instance_factory)
+    )
     resolver.add_type_handler(AbstractTypeHandler())
     resolver.add_type_handler(
         BuiltinsTypeHandler(my_builtins=[int, float, str, bytearray, bytes])
@@ -1,13 +1,78 @@
 from enum import Enum
+from typing import Any
+from typing import Dict
+from typing import Union
+from typing import cast
 
 
 class Lifetime(Enum):
     """Specifies the lifetime for objects created by the container
 
-    :Lifetime.SINGLETON: :py:meth:`smart_injector.StaticContainer.get` returns the same every instance on every call
+    :Lifetime.SINGLETON: :py:meth:`smart_injector.StaticContainer.get` returns the same every instance on every call.
+        With ``Lifetime.SINGLETON(eager=True)`` the instance is created in the background as soon as the container was
+        created. A call of `get` during the creation waits for it.
     :Lifetime.TRANSIENT: :py:meth:`smart_injector.StaticContainer.get` returns a new instance on every call
+    :Lifetime.CACHED: :py:meth:`smart_injector.StaticContainer.get` returns the same instance until it expires. Options
+        can be provided by calling the lifetime, e.g. ``Lifetime.CACHED(ttl=60, maxsize=100, refresh=True)``.
+        `ttl` is the time to live in seconds (None: never expires), `maxsize` the maximum number of cached
+        instances (least recently used instances are evicted first) and with `refresh` an expired instance is
+        returned once more while a new instance is created in the background. The resources of an instance are cleaned
+        up, when it is evicted or replaced after it expired.
+    :Lifetime.POOLED: instances are checked out from a bounded pool with :py:meth:`smart_injector.StaticContainer.acquire`
+        and returned to the pool afterwards, e.g. ``Lifetime.POOLED(size=4, timeout=1.0)``. `size` is the maximum number
+        of instances and `timeout` the maximum time in seconds to wait for a free instance (None: wait forever).
+    :Lifetime.THREAD: :py:meth:`smart_injector.StaticContainer.get` returns the same instance on every call within the
+        same thread. The instances of a thread are released and their resources are cleaned up when the thread exits.
+    :Lifetime.PARTITIONED: :py:meth:`smart_injector.StaticContainer.get` returns the same instance for the same
+        partition key, e.g. ``Lifetime.PARTITIONED(key=current_tenant, maxsize=100)``. `key` is a function without
+        arguments or a :py:class:`contextvars.ContextVar`, which returns the current partition key. `maxsize` is the
+        maximum number of partitions (least recently used partitions are evicted first) and `on_evict` is called with
+        evicted instances. The resources of an evicted partition are cleaned up afterwards. By default evicted
+        instances without resources are closed, if they have a `close` method.
     """
 
     SINGLETON = 0
     TRANSIENT = 1
     _INTERNAL_DEFAULT = 2
+    CACHED = 3
+    POOLED = 4
+    THREAD = 5
+    PARTITIONED = 6
+
+    def __call__(self, **options: Any) -> "LifetimeSetting":
+        return LifetimeSetting(self, **options)
+
+
+_OPTIONS = cast(
+    Dict[Lifetime, Dict[str, Any]],
+    {
+        Lifetime.SINGLETON: {"eager": False},
+        Lifetime.CACHED: {"ttl": None, "maxsize": None, "refresh": False},
+        Lifetime.POOLED: {"size": 1, "timeout": None},
+        Lifetime.PARTITIONED: {"key": None, "maxsize": None, "on_evict": None},
+    },
+)
+
+
+class LifetimeSetting:
+    """A lifetime together with its options. Created by calling a lifetime, e.g. ``Lifetime.CACHED(ttl=60)``"""
+
+    def __init__(self, lifetime: Lifetime, **options: Any):
+        defaults = _OPTIONS.get(lifetime, {})
+        for option in options:
+            if option not in defaults:
+                raise TypeError(
+                    "option {option} not expected for {lifetime}".format(
+                        option=option, lifetime=lifetime
+                    )
+                )
+        if lifetime is Lifetime.PARTITIONED and options.get("key") is None:
+            raise TypeError("{lifetime} requires a key".format(lifetime=lifetime))
+        self.lifetime = lifetime
+        self.options = dict(defaults, **options)
+
+
+def as_setting(lifetime: Union[Lifetime, LifetimeSetting]) -> LifetimeSetting:
+    if isinstance(lifetime, LifetimeSetting):
+        return lifetime
+    return lifetime()
@@ -1,36 +1,55 @@
 import inspect
+import tracemalloc
 from abc import abstractmethod
 from typing import Any
 from typing import Callable
 from typing import Dict
 from typing import List
+from typing import Optional
+from typing import Tuple
 from typing import Type
+from typing import cast
 
+from smart_injector.config.backend import MISSING
+from smart_injector.config.backend import ArgProxy
 from smart_injector.config.backend import Bindings
 from smart_injector.config.backend import ConfigEntry
 from smart_injector.config.backend import ConfigVisibility
+from smart_injector.config.backend import ConstructionProfile
 from smart_injector.config.backend import FactoryArgs
 from smart_injector.config.backend import Instances
 from smart_injector.config.backend import Lifetimes
+from smart_injector.config.backend import ResourceOwners
+from smart_injector.config.backend import Resources
+from smart_injector.config.backend import Signatures
+from smart_injector.config.backend import ValueArg
+from smart_injector.config.user import is_base_class
 from smart_injector.container.container import S
 from smart_injector.container.container import T
+from smart_injector.lifetime import Lifetime
 from smart_injector.resolver.resolver import Resolver
 from smart_injector.types import Handler
+from smart_injector.types import Plan
 from smart_injector.types import ResolveRequest
-
-
-def dependencies(a_type: Callable[..., T]) -> Dict[str, Type[Any]]:
-    """returns dependencies of a callable"""
-    return {
-        parameter.name: parameter.annotation
-        for parameter in inspect.signature(a_type).parameters.values()
-    }
+from smart_injector.types import Scope
+from smart_injector.types import construction
+from smart_injector.utility import generic_origin
+from smart_injector.utility import list_item_type
+from smart_injector.utility import optional_type
+from smart_injector.utility import specialize
+from smart_injector.utility import split_named
 
 
 class InstanceHandler(Handler):
     """return an a priori set instance for a type"""
-    def __init__(self, instances: Instances):
+    def __init__(
+        self, instances: Instances, profile: Optional[ConstructionProfile] = None
+    ):
+        """
+        :param profile: records the requests of instances created by the container, e.g. singletons
+        """
         self._instances = instances
+        self._profile = profile
 
     def can_handle_type(self, request: ResolveRequest) -> bool:
         return (
@@ -40,7 +59,19 @@ class InstanceHandler(Handler):
         )
 
     def handle(self, request: ResolveRequest) -> T:
-        return self._instances.get_instance(request.local_config_entry())
+        entry = request.local_config_entry()
+        if self._profile is not None and (
+            self._instances.is_created(entry)
+            or self._instances.is_created(request.global_config_entry())
+        ):
+            self._profile.record_use(entry.a_type)
+        return self._instances.get_instance(entry)
+
+    def compile(self, request: ResolveRequest) -> Plan:
+        if self._profile is not None:
+            return Plan(lambda: self.handle(request), shared=True)
+        instance = self.handle(request)
+        return Plan(lambda: instance, shared=True)
 
 
 class BindingHandler(Handler):
@@ -57,16 +88,121 @@ class BindingHandler(Handler):
         )
 
     def handle(self, request: ResolveRequest) -> S:
-        return self._resolver.get_new_instance(
-            request.new_request_with_same_origin(
-                self._bindings.get_binding(request.local_config_entry())
-            )
+        return self._resolver.get_new_instance(self._bound_request(request))
+
+    def compile(self, request: ResolveRequest) -> Plan:
+        return self._resolver.compile(self._bound_request(request))
+
+    def _bound_request(self, request: ResolveRequest) -> ResolveRequest:
+        return request.new_request_with_same_origin(
+            self._bindings.get_binding(request.local_config_entry())
+        )
+
+
+class NamedTypeHandler(Handler):
+    """resolves `Annotated[T, name]` as `T`, if nothing was configured for the name"""
+
+    def __init__(self, resolver: Resolver):
+        self._resolver = resolver
+
+    def can_handle_type(self, request: ResolveRequest) -> bool:
+        return True if split_named(request.real_type)[1] is not None else False
+
+    def handle(self, request: ResolveRequest) -> T:
+        return self._resolver.get_new_instance(self._unnamed_request(request))
+
+    def compile(self, request: ResolveRequest) -> Plan:
+        return self._resolver.compile(self._unnamed_request(request))
+
+    def _unnamed_request(self, request: ResolveRequest) -> ResolveRequest:
+        return request.new_request_with_same_origin(split_named(request.real_type)[0])
+
+
+class OptionalTypeHandler(Handler):
+    """resolves `Optional[T]` as `T`, if `T` was configured, and as None otherwise"""
+
+    def __init__(
+        self, resolver: Resolver, configured: Callable[[ConfigEntry], bool]
+    ):
+        self._resolver = resolver
+        self._configured = configured
+
+    def can_handle_type(self, request: ResolveRequest) -> bool:
+        return True if optional_type(request.real_type) is not None else False
+
+    def handle(self, request: ResolveRequest) -> T:
+        if not self._is_configured(request):
+            return cast(T, None)
+        return self._resolver.get_new_instance(self._inner_request(request))
+
+    def compile(self, request: ResolveRequest) -> Plan:
+        if not self._is_configured(request):
+            return Plan(lambda: None, shared=True)
+        return self._resolver.compile(self._inner_request(request))
+
+    def _is_configured(self, request: ResolveRequest) -> bool:
+        inner = optional_type(request.real_type)
+        origin = generic_origin(inner)
+        return self._configured(ConfigEntry(inner, request.where)) or (
+            origin is not None and self._configured(ConfigEntry(origin, request.where))
+        )
+
+    def _inner_request(self, request: ResolveRequest) -> ResolveRequest:
+        return request.new_request_with_same_origin(optional_type(request.real_type))
+
+
+class GenericTypeHandler(Handler):
+    """resolves a parameterized generic `G[A]` with a binding of its origin `G`. E.g. with a binding from `Repository`
+    to `SqlRepository`, `Repository[User]` is resolved as `SqlRepository[User]`"""
+
+    def __init__(self, resolver: Resolver, bindings: Bindings):
+        self._resolver = resolver
+        self._bindings = bindings
+        self._specializations = cast(Dict[Tuple[Any, Any], Any], {})
+
+    def can_handle_type(self, request: ResolveRequest) -> bool:
+        origin = generic_origin(request.real_type)
+        return (
+            True
+            if origin is not None
+            and self._bindings.get_binding(ConfigEntry(origin, request.where))
+            is not origin
+            else False
         )
 
+    def handle(self, request: ResolveRequest) -> T:
+        return self._resolver.get_new_instance(self._specialized_request(request))
+
+    def compile(self, request: ResolveRequest) -> Plan:
+        return self._resolver.compile(self._specialized_request(request))
+
+    def _specialized_request(self, request: ResolveRequest) -> ResolveRequest:
+        bound = self._bindings.get_binding(
+            ConfigEntry(generic_origin(request.real_type), request.where)
+        )
+        key = (request.real_type, bound)
+        try:
+            specialized = self._specializations[key]
+        except KeyError:
+            specialized = specialize(bound, request.real_type.__args__)
+            if (
+                inspect.isclass(specialized) or generic_origin(specialized) is not None
+            ) and not is_base_class(request.real_type, specialized):
+                raise TypeError(
+                    "{bound} is bound to {origin}, but is no subclass of {a_type}".format(
+                        bound=bound,
+                        origin=generic_origin(request.real_type),
+                        a_type=request.real_type,
+                    )
+                )
+            self._specializations[key] = specialized
+        return request.new_request_with_same_origin(specialized)
+
 
 class AbstractTypeHandler(Handler):
     def can_handle_type(self, request: ResolveRequest) -> bool:
-        return True if inspect.isabstract(request.real_type) else False
+        a_type = generic_origin(request.real_type) or request.real_type
+        return True if inspect.isabstract(a_type) else False
 
     def handle(self, request: ResolveRequest) -> T:
         raise TypeError("No binding for abstract base {0}".format(request.real_type))
@@ -84,16 +220,119 @@ class BuiltinsTypeHandler(Handler):
         return request.real_type()
 
 
+_VARIADIC = (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD)
+
+
 class InstanceFactory:
     """creates new instances of a type"""
-    def __init__(self, resolver: Resolver, args: FactoryArgs):
+    def __init__(
+        self,
+        resolver: Resolver,
+        args: FactoryArgs,
+        signatures: Optional[Signatures] = None,
+        bindings: Optional[Bindings] = None,
+        profile: Optional[ConstructionProfile] = None,
+        resources: Optional[ResourceOwners] = None,
+        configured: Optional[Callable[[ConfigEntry], bool]] = None,
+    ):
+        """
+        :param configured: returns True, if a type was configured explicitly. Parameters with defaults are only
+            injected, if their type was configured
+        """
         self._resolver = resolver
         self._args = args
+        self._signatures = Signatures() if signatures is None else signatures
+        self._bindings = Bindings() if bindings is None else bindings
+        self._profile = profile
+        self._resources = ResourceOwners() if resources is None else resources
+        self._configured = (lambda what: False) if configured is None else configured
 
     def create(self, context: ResolveRequest) -> T:
-        return context.real_type(
+        if self._profile is not None:
+            return self._profile.measure(
+                context.real_type, lambda: self._create(context)
+            )
+        return self._create(context)
+
+    @property
+    def profile(self) -> Optional[ConstructionProfile]:
+        return self._profile
+
+    def create_shared(
+        self, context: ResolveRequest, owner: Optional[Resources] = None
+    ) -> T:
+        """creates an instance kept by the container or a scope
+
+        :param owner: owner of its resources. By default the container
+        """
+        with self._resources.using(self._resources.container if owner is None else owner):
+            return self.create(context)
+
+    def _create(self, context: ResolveRequest) -> T:
+        item_type = list_item_type(context.real_type)
+        if item_type is not None:
+            return cast(T, self._members(context, item_type))
+        instance = context.real_type(
             **self._dependency_instances(context), **self._factory_args(context)
         )
+        if self._signatures.is_resource_factory(context.real_type):
+            return self._resources.enter(instance, context.real_type)
+        return instance
+
+    def compile(self, context: ResolveRequest) -> Plan:
+        """returns a plan, which creates new instances like :py:meth:`create`"""
+        item_type = list_item_type(context.real_type)
+        if item_type is not None:
+            members = [
+                self._resolver.compile(request)
+                for request in self._member_requests(context, item_type)
+            ]
+            return Plan(lambda: [member.build() for member in members])
+        factory_args = self._args.get_factory_args(context.local_config_entry())
+        arguments = {
+            name: self._resolver.compile(context.get_new_dependency_context(dependent))
+            for name, dependent in self._injected(context, factory_args).items()
+        }
+        for name, value in factory_args.items():
+            arguments[name] = self._argument_plan(value)
+        enter = (
+            (lambda instance: self._resources.enter(instance, context.real_type))
+            if self._signatures.is_resource_factory(context.real_type)
+            else None
+        )
+        parameters = frozenset(
+            parameter.name
+            for parameter in self._signatures.parameters(context.real_type)
+            if parameter.kind not in _VARIADIC
+        )
+        plan = construction(context.real_type, arguments, enter, parameters)
+        profile = self._profile
+        if profile is not None:
+            build = plan.build
+            plan.build = lambda: profile.measure(context.real_type, build)
+        return plan
+
+    def _argument_plan(self, value: ArgProxy) -> Plan:
+        if isinstance(value, ValueArg):
+            instance = value.get(self._resolver)
+            return Plan(lambda: instance, shared=True)
+        return Plan(lambda: value.get(self._resolver))
+
+    def _members(self, context: ResolveRequest, item_type: Any) -> List[Any]:
+        return [
+            self._resolver.get_new_instance(request)
+            for request in self._member_requests(context, item_type)
+        ]
+
+    def _member_requests(
+        self, context: ResolveRequest, item_type: Any
+    ) -> List[ResolveRequest]:
+        return [
+            ResolveRequest(member, member, context.where)
+            for member in self._bindings.get_members(
+                ConfigEntry(item_type, context.where)
+            )
+        ]
 
     def _factory_args(self, context: ResolveRequest) -> Dict[str, Any]:
         return {
@@ -108,10 +347,41 @@ class InstanceFactory:
             name: self._resolver.get_new_instance(
                 context.get_new_dependency_context(dependent)
             )
-            for name, dependent in dependencies(context.real_type).items()
-            if name not in self._args.get_factory_args(context.local_config_entry())
+            for name, dependent in self._injected(
+                context, self._args.get_factory_args(context.local_config_entry())
+            ).items()
         }
 
+    def _injected(
+        self, context: ResolveRequest, factory_args: Dict[str, ArgProxy]
+    ) -> Dict[str, Any]:
+        """returns the parameters, which are resolved by the container, with their annotations. Variadic parameters
+        and parameters with defaults are left to the callable, unless their type was configured"""
+        injected = {}
+        for parameter in self._signatures.parameters(context.real_type):
+            if parameter.name in factory_args or parameter.kind in _VARIADIC:
+                continue
+            if parameter.has_default and not self._is_configured(
+                parameter.annotation, context
+            ):
+                continue
+            if parameter.annotation is inspect.Parameter.empty:
+                raise TypeError(
+                    "parameter {name} of {a_type} has no annotation and no argument was configured".format(
+                        name=parameter.name, a_type=context.real_type
+                    )
+                )
+            injected[parameter.name] = parameter.annotation
+        return injected
+
+    def _is_configured(self, annotation: Any, context: ResolveRequest) -> bool:
+        if annotation is inspect.Parameter.empty:
+            return False
+        inner = list_item_type(annotation) or optional_type(annotation)
+        if inner is not None:
+            annotation = inner
+        return self._configured(ConfigEntry(annotation, context.base_type))
+
 
 class NewInstanceHandler(Handler):
     def __init__(self, factory: InstanceFactory):
@@ -123,59 +393,155 @@ class NewInstanceHandler(Handler):
     def handle(self, request: ResolveRequest) -> T:
         return self._factory.create(request)
 
+    def compile(self, request: ResolveRequest) -> Plan:
+        return self._factory.compile(request)
+
+
+class LifetimeHandler(Handler):
+    """base for handlers, which keep created instances according to a configured lifetime"""
+
+    def __init__(self, lifetimes: Lifetimes, instance_factory: InstanceFactory):
+        self._lifetimes = lifetimes
+        self._instance_factory = instance_factory
+
+    def _instance_context(self, context: ResolveRequest) -> ConfigEntry:
+        if (
+            self._lifetimes.visibility(context.local_config_entry())
+            is ConfigVisibility.LOCAL
+        ):
+            return self._local_config_entry(context)
+        else:
+            return self._global_config_entry(context)
+
+    @abstractmethod
+    def _local_config_entry(self, context: ResolveRequest) -> ConfigEntry:
+        pass
+
+    @abstractmethod
+    def _global_config_entry(self, context: ResolveRequest) -> ConfigEntry:
+        pass
+
 
-class SingletonHandler(Handler):
+class SingletonHandler(LifetimeHandler):
     def __init__(
         self,
         lifetimes: Lifetimes,
         instances: Instances,
         instance_factory: InstanceFactory,
     ):
-        self._lifetimes = lifetimes
+        super().__init__(lifetimes, instance_factory)
         self._instances = instances
-        self._instance_factory = instance_factory
 
     def can_handle_type(self, request: ResolveRequest) -> bool:
         return True if self._is_singleton(request) else False
 
     def handle(self, request: ResolveRequest) -> T:
         if self._singleton_not_created(request):
-            self._create_singleton(request)
+            with self._instances.lock(self._instance_context(request)):
+                if self._singleton_not_created(request):
+                    self._create_singleton(request)
+        profile = self._instance_factory.profile
+        if profile is not None:
+            profile.record_use(self._instance_context(request).a_type)
         return self._get_singleton(request)
 
+    def compile(self, request: ResolveRequest) -> Plan:
+        entry = self._local_config_entry(request)
+        instances = self._instances
+        if self._instance_factory.profile is not None:
+            return Plan(lambda: self.handle(request), shared=True)
+
+        def build() -> Any:
+            instance = instances.find(entry)
+            if instance is not MISSING:
+                return instance
+            return self.handle(request)
+
+        return Plan(build, shared=True)
+
     def _is_singleton(self, context: ResolveRequest):
         return self._lifetimes.is_singleton(self._local_config_entry(context))
 
     def _singleton_not_created(self, context: ResolveRequest) -> bool:
-        return not self._instances.has_instance(context.local_config_entry())
+        return not self._instances.has_instance(self._local_config_entry(context))
 
     def _create_singleton(self, context: ResolveRequest):
-        self._instances.set_instance(
-            self._instance_context(context), self._instance_factory.create(context)
+        if not tracemalloc.is_tracing():
+            self._instances.set_created_instance(
+                self._instance_context(context),
+                self._instance_factory.create_shared(context),
+            )
+            return
+        before = tracemalloc.get_traced_memory()[0]
+        instance = self._instance_factory.create_shared(context)
+        size = max(tracemalloc.get_traced_memory()[0] - before, 0)
+        self._instances.set_created_instance(
+            self._instance_context(context), instance, size
         )
 
-    def _instance_context(self, context: ResolveRequest) -> ConfigEntry:
-        if (
-            self._lifetimes.visibility(context.local_config_entry())
-            is ConfigVisibility.LOCAL
-        ):
-            return self._local_config_entry(context)
-        else:
-            return self._global_config_entry(context)
-
     def _get_singleton(self, context: ResolveRequest) -> T:
         return self._instances.get_instance(self._local_config_entry(context))
 
-    @abstractmethod
+
+class SingletonBaseTypeHandler(SingletonHandler):
     def _local_config_entry(self, context: ResolveRequest) -> ConfigEntry:
-        pass
+        return context.local_base_config_entry()
 
-    @abstractmethod
     def _global_config_entry(self, context: ResolveRequest) -> ConfigEntry:
-        pass
+        return context.global_base_config_entry()
 
 
-class SingletonBaseTypeHandler(SingletonHandler):
+class SingletonEffectiveHandler(SingletonHandler):
+    def _local_config_entry(self, context: ResolveRequest) -> ConfigEntry:
+        return context.local_config_entry()
+
+    def _global_config_entry(self, context: ResolveRequest) -> ConfigEntry:
+        return context.global_config_entry()
+
+
+class ScopedHandler(LifetimeHandler):
+    """handles lifetimes, whose instances are kept by a :py:class:`smart_injector.types.Scope`"""
+
+    def __init__(
+        self,
+        lifetimes: Lifetimes,
+        scopes: Dict[Lifetime, Scope],
+        instance_factory: InstanceFactory,
+    ):
+        super().__init__(lifetimes, instance_factory)
+        self._scopes = scopes
+
+    def can_handle_type(self, request: ResolveRequest) -> bool:
+        return (
+            True
+            if self._lifetimes.get_lifetime(self._local_config_entry(request))
+            in self._scopes
+            else False
+        )
+
+    def handle(self, request: ResolveRequest) -> T:
+        setting = self._lifetimes.get_setting(self._local_config_entry(request))
+        scope = self._scopes[setting.lifetime]
+        return scope.get(
+            self._instance_context(request),
+            setting,
+            lambda: self._instance_factory.create_shared(
+                request, scope.resource_owner()
+            ),
+        )
+
+    def compile(self, request: ResolveRequest) -> Plan:
+        setting = self._lifetimes.get_setting(self._local_config_entry(request))
+        scope = self._scopes[setting.lifetime]
+        entry = self._instance_context(request)
+
+        def create() -> Any:
+            return self._instance_factory.create_shared(request, scope.resource_owner())
+
+        return Plan(lambda: scope.get(entry, setting, create), shared=True)
+
+
+class ScopedBaseTypeHandler(ScopedHandler):
     def _local_config_entry(self, context: ResolveRequest) -> ConfigEntry:
         return context.local_base_config_entry()
 
@@ -183,7 +549,7 @@ class SingletonBaseTypeHandler(SingletonHandler):
         return context.global_base_config_entry()
 
 
-class SingletonEffectiveHandler(SingletonHandler):
+class ScopedEffectiveHandler(ScopedHandler):
     def _local_config_entry(self, context: ResolveRequest) -> ConfigEntry:
         return context.local_config_entry()
 
@@ -4,6 +4,7 @@ from typing import TypeVar
 from typing import cast
 
 from smart_injector.types import Handler
+from smart_injector.types import Plan
 from smart_injector.types import ResolveRequest
 
 T = TypeVar("T")
@@ -21,9 +22,16 @@ class Resolver:
         return self.get_new_instance(ResolveRequest(a_type, a_type, None))
 
     def get_new_instance(self, context: ResolveRequest) -> T:
+        return self._handler(context).handle(context)
+
+    def compile(self, context: ResolveRequest) -> Plan:
+        """returns a plan, which resolves the request without asking the handlers again"""
+        return self._handler(context).compile(context)
+
+    def _handler(self, context: ResolveRequest) -> Handler:
         for handler in cast(
             List[Handler], self._type_handlers
         ):  # use list cast to surpress pylama List not used warning
             if handler.can_handle_type(context):
-                return handler.handle(context)
+                return handler
         assert False, "should not reach this. you should have added a default handler"
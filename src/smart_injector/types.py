@@ -1,9 +1,14 @@
 from abc import ABC
 from abc import abstractmethod
+from typing import Any
 from typing import Callable
+from typing import Dict
+from typing import FrozenSet
 from typing import Optional
 from typing import TypeVar
 
+from smart_injector.lifetime import LifetimeSetting
+
 T = TypeVar("T")
 
 
@@ -14,6 +19,14 @@ class ConfigEntry:
         self.a_type = a_type
         self.where = where
 
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ConfigEntry):
+            return NotImplemented
+        return self.a_type == other.a_type and self.where == other.where
+
+    def __hash__(self) -> int:
+        return hash((self.a_type, self.where))
+
 
 class ResolveRequest:
     def __init__(
@@ -47,6 +60,104 @@ class ResolveRequest:
         return ConfigEntry(self.base_type, where=None)
 
 
+class Plan:
+    """Resolution of a request computed once. :py:attr:`build` returns an instance without asking the handlers again.
+
+    :ivar build: function, which returns an instance
+    :ivar shared: True, if build returns an instance kept by the container (e.g. a singleton) instead of a new one
+    :ivar target: callable called by build to construct a new instance. None, if build does not call a constructor
+    :ivar arguments: plans for the arguments of target
+    :ivar enter: function, which turns the result of target into the instance, e.g. enters a context manager
+    :ivar parameters: names of all parameters of target, which can be overridden. Parameters left to their defaults
+        have no argument plan
+    """
+
+    def __init__(
+        self,
+        build: Callable[[], T],
+        shared: bool = False,
+        target: Optional[Callable[..., T]] = None,
+        arguments: Optional[Dict[str, "Plan"]] = None,
+        enter: Optional[Callable[[Any], Any]] = None,
+        parameters: Optional[FrozenSet[str]] = None,
+    ):
+        self.build = build
+        self.shared = shared
+        self.target = target
+        self.arguments = {} if arguments is None else arguments
+        self.enter = enter
+        self.parameters = (
+            frozenset(self.arguments) if parameters is None else parameters
+        )
+
+    def build_with(self, overrides: Dict[str, Any]) -> Any:
+        """builds a new instance with the given arguments instead of the instances of the argument plans"""
+        if self.target is None:
+            raise TypeError(
+                "arguments {names} cannot be overridden, because no new instance is constructed".format(
+                    names=sorted(overrides)
+                )
+            )
+        unexpected = set(overrides) - self.parameters
+        if unexpected:
+            raise TypeError(
+                "{target} has no parameters {names}".format(
+                    target=self.target, names=sorted(unexpected)
+                )
+            )
+        arguments = {
+            name: plan.build()
+            for name, plan in self.arguments.items()
+            if name not in overrides
+        }
+        arguments.update(overrides)
+        instance = self.target(**arguments)
+        return instance if self.enter is None else self.enter(instance)
+
+
+def construction(
+    target: Callable[..., T],
+    arguments: Dict[str, Plan],
+    enter: Optional[Callable[[Any], Any]] = None,
+    parameters: Optional[FrozenSet[str]] = None,
+) -> Plan:
+    """returns a plan, which calls target with the instances built by the argument plans
+
+    :param parameters: names of all parameters of target. By default the names of the arguments
+    """
+    items = list(arguments.items())
+
+    if enter is None:
+
+        def build() -> Any:
+            return target(**{name: plan.build() for name, plan in items})
+
+    else:
+
+        def build() -> Any:
+            return enter(target(**{name: plan.build() for name, plan in items}))
+
+    return Plan(
+        build, target=target, arguments=arguments, enter=enter, parameters=parameters
+    )
+
+
+def batch(plan: Plan) -> Plan:
+    """returns a plan for building many instances. Shared instances are built once by the returned plan and then
+    reused, only new instances are built on every call"""
+    if plan.shared:
+        instance = plan.build()
+        return Plan(lambda: instance, shared=True)
+    if plan.target is None:
+        return plan
+    return construction(
+        plan.target,
+        {name: batch(argument) for name, argument in plan.arguments.items()},
+        plan.enter,
+        plan.parameters,
+    )
+
+
 class Handler(ABC):
     @abstractmethod
     def can_handle_type(self, request: ResolveRequest) -> bool:
@@ -55,3 +166,26 @@ class Handler(ABC):
     @abstractmethod
     def handle(self, request: ResolveRequest) -> T:
         pass
+
+    def compile(self, request: ResolveRequest) -> Plan:
+        """returns a plan, which resolves the request like :py:meth:`handle`. Handlers override it to do the work,
+        which is the same on every call, only once"""
+        return Plan(lambda: self.handle(request))
+
+
+class Scope(ABC):
+    """keeps instances for a lifetime, which is neither transient nor singleton"""
+
+    @abstractmethod
+    def get(
+        self, what: ConfigEntry, setting: LifetimeSetting, create: Callable[[], T]
+    ) -> T:
+        pass
+
+    def copy(self) -> "Scope":
+        """returns the scope for a reconfigured container. By default instances are kept"""
+        return self
+
+    def resource_owner(self) -> Optional[Any]:
+        """returns the owner of the resources of an instance created by the current thread. None: the container"""
+        return None
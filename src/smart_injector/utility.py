@@ -1,15 +1,430 @@
+import collections.abc
+import contextlib
+import importlib
 import inspect
+import sys
+import typing
+from typing import Any
 from typing import Callable
+from typing import Dict
+from typing import List
 from typing import Optional
+from typing import Tuple
 from typing import Type
 from typing import TypeVar
 
+try:
+    from typing import Annotated  # type: ignore
+except ImportError:  # pragma: no cover
+    try:
+        from typing_extensions import Annotated  # type: ignore
+    except ImportError:
+        Annotated = None
+
+try:
+    import dataclasses  # type: Any
+except ImportError:  # pragma: no cover python 3.6
+    dataclasses = None
+
+try:
+    import attr  # type: Any
+except ImportError:  # pragma: no cover
+    attr = None
+
 T = TypeVar("T")
 
+_HINTS_WITH_EXTRAS = "include_extras" in inspect.signature(typing.get_type_hints).parameters
+
 
 def get_return_type(a_type: Callable[..., T]) -> Optional[Type[T]]:
     """returns the return type of a callable if it is available"""
-    r_type = inspect.signature(a_type).return_annotation
+    r_type = get_type_hints(a_type).get(
+        "return", inspect.signature(a_type).return_annotation
+    )
     if r_type is inspect.Signature.empty:
         return None
     return r_type
+
+
+_RESOURCE_ORIGINS = tuple(
+    getattr(module, name)
+    for module in (typing, collections.abc, contextlib)
+    for name in (
+        "Iterator",
+        "Generator",
+        "AsyncIterator",
+        "AsyncGenerator",
+        "ContextManager",
+        "AsyncContextManager",
+        "AbstractContextManager",
+        "AbstractAsyncContextManager",
+    )
+    if hasattr(module, name)
+)
+
+
+def resource_type(annotation: Any) -> Optional[Any]:
+    """returns `T` for the return annotation of a factory, which yields a resource, e.g. `Iterator[T]` or
+    `ContextManager[T]`. Returns None for other annotations"""
+    if getattr(annotation, "__origin__", None) not in _RESOURCE_ORIGINS:
+        return None
+    args = getattr(annotation, "__args__", None)
+    return args[0] if args else None
+
+
+def produced_type(factory: Callable[..., T]) -> Optional[Any]:
+    """returns the type of the instances created by a factory. For resource factories it is the type of the resource"""
+    r_type = get_return_type(factory)
+    inner = resource_type(r_type)
+    return r_type if inner is None else inner
+
+
+def is_resource_factory(factory: Callable[..., T]) -> bool:
+    """returns True for generator and async generator functions and factories annotated to return a context manager,
+    whose instances are entered when created and cleaned up when closed"""
+    if inspect.isclass(factory) or generic_origin(factory) is not None:
+        return False
+    if inspect.isgeneratorfunction(factory) or getattr(
+        inspect, "isasyncgenfunction", lambda f: False
+    )(factory):
+        return True
+    try:
+        return resource_type(get_return_type(factory)) is not None
+    except (TypeError, ValueError):
+        return False
+
+
+def generic_origin(a_type: Any) -> Optional[type]:
+    """returns `G` for a parameterized generic class `G[A]` or None for other types"""
+    if hasattr(a_type, "__metadata__"):  # Annotated
+        return None
+    origin = getattr(a_type, "__origin__", None)
+    if origin is None or origin is a_type or not inspect.isclass(origin):
+        return None
+    if not getattr(a_type, "__args__", None):
+        return None
+    return origin
+
+
+def open_generic(a_type: Any) -> Any:
+    """returns `G` for `G[T]`, if all arguments are type variables. Other types are returned unchanged"""
+    origin = generic_origin(a_type)
+    if origin is not None and all(isinstance(arg, TypeVar) for arg in a_type.__args__):
+        return origin
+    return a_type
+
+
+def specialize(a_type: Any, args: Tuple[Any, ...]) -> Any:
+    """returns `a_type[args]`, if a_type is a generic with as many type parameters as args. Otherwise a_type"""
+    parameters = getattr(a_type, "__parameters__", ())
+    if generic_origin(a_type) is None and parameters and len(parameters) == len(args):
+        return a_type[args if len(args) > 1 else args[0]]
+    return a_type
+
+
+def substitute(annotation: Any, substitutions: Dict[Any, Any]) -> Any:
+    """replaces type variables in an annotation, e.g. `List[T]` becomes `List[User]` for `{T: User}`"""
+    if isinstance(annotation, TypeVar):
+        return substitutions.get(annotation, annotation)
+    parameters = getattr(annotation, "__parameters__", ())
+    if parameters and getattr(annotation, "__args__", None):
+        try:
+            return annotation[
+                tuple(substitutions.get(parameter, parameter) for parameter in parameters)
+            ]
+        except TypeError:
+            return annotation
+    return annotation
+
+
+def base_arguments(a_type: Any, base: type) -> Optional[Tuple[Any, ...]]:
+    """returns the type arguments of the generic class `base` as a base of a_type, e.g. `(User,)` for
+    `SqlRepository[User]` and `Repository`. Unknown arguments are type variables. None, if base is no base of a_type
+    """
+    origin = generic_origin(a_type) or a_type
+    parameters = getattr(origin, "__parameters__", ())
+    arguments = parameters if origin is a_type else a_type.__args__
+    if origin is base:
+        return tuple(arguments)
+    substitutions = dict(zip(parameters, arguments))
+    for orig_base in getattr(origin, "__orig_bases__", origin.__bases__):
+        found = base_arguments(substitute(orig_base, substitutions), base)
+        if found is not None:
+            return found
+    return None
+
+
+def named(a_type: Any, name: str) -> Any:
+    """returns the key of a named type, which is `Annotated[a_type, name]`"""
+    if Annotated is None:
+        raise TypeError(
+            "named types require typing.Annotated (python 3.9) or typing_extensions"
+        )
+    return Annotated[a_type, name]
+
+
+def split_named(a_type: Any) -> Tuple[Any, Optional[str]]:
+    """returns the annotated type and its name for `Annotated[T, "name"]`. Other types are returned unchanged without
+    name"""
+    metadata = getattr(a_type, "__metadata__", None)
+    if metadata is None:
+        return a_type, None
+    for item in metadata:
+        if isinstance(item, str):
+            return a_type.__origin__, item
+    return a_type.__origin__, None
+
+
+def canonical_annotation(annotation: Any) -> Any:
+    """normalizes an annotation to a configuration key. Annotated types keep only their name"""
+    a_type, name = split_named(annotation)
+    if a_type is annotation:
+        return annotation
+    return a_type if name is None else named(a_type, name)
+
+
+def list_item_type(a_type: Any) -> Optional[Any]:
+    """returns `T` for `List[T]` or None if a_type is not a list type"""
+    if getattr(a_type, "__origin__", None) not in (list, List):
+        return None
+    args = getattr(a_type, "__args__", None)
+    if not args or len(args) != 1 or isinstance(args[0], TypeVar):
+        return None
+    return args[0]
+
+
+def optional_type(a_type: Any) -> Optional[Any]:
+    """returns `T` for `Optional[T]` or `T | None` or None if a_type is not optional"""
+    if getattr(a_type, "__origin__", None) is not typing.Union and type(
+        a_type
+    ).__name__ != "UnionType":
+        return None
+    args = getattr(a_type, "__args__", ())
+    others = [arg for arg in args if arg is not type(None)]
+    if len(args) != 2 or len(others) != 1:
+        return None
+    return others[0]
+
+
+def import_string(path: str) -> Any:
+    """imports an object given as "package.module:name". name may contain dots to get nested attributes"""
+    module_name, sep, name = path.partition(":")
+    if not sep or not module_name or not name:
+        raise ValueError(
+            "{path} is not an import string of form 'package.module:name'".format(
+                path=path
+            )
+        )
+    result = importlib.import_module(module_name)  # type: Any
+    for attribute in name.split("."):
+        result = getattr(result, attribute)
+    return result
+
+
+def get_type_hints(a_callable: Callable[..., T]) -> Dict[str, Any]:
+    """returns the evaluated annotations of a callable. For a class the annotations of its constructor are returned.
+    String annotations (e.g. with `from __future__ import annotations`) are evaluated in the module of the callable.
+    Annotations which cannot be evaluated are returned unchanged"""
+    target = a_callable.__init__ if inspect.isclass(a_callable) else a_callable  # type: Any
+    if not inspect.isroutine(target) and hasattr(target, "__call__"):
+        target = target.__call__
+    try:
+        if _HINTS_WITH_EXTRAS:
+            return typing.get_type_hints(target, include_extras=True)
+        return typing.get_type_hints(target)
+    except Exception:
+        pass
+    global_namespace = getattr(target, "__globals__", {})
+    hints = {}
+    for name, annotation in getattr(target, "__annotations__", {}).items():
+        if isinstance(annotation, str):
+            try:
+                annotation = eval(annotation, global_namespace)
+            except Exception:
+                pass
+        hints[name] = annotation
+    return hints
+
+
+class Parameter:
+    """a parameter of a callable
+
+    :ivar name: name of the parameter
+    :ivar annotation: evaluated annotation or :py:attr:`inspect.Parameter.empty`
+    :ivar has_default: True, if the parameter can be omitted
+    :ivar kind: one of the kinds of :py:class:`inspect.Parameter`
+    """
+
+    __slots__ = ("name", "annotation", "has_default", "kind")
+
+    def __init__(
+        self,
+        name: str,
+        annotation: Any,
+        has_default: bool = False,
+        kind: Any = inspect.Parameter.POSITIONAL_OR_KEYWORD,
+    ):
+        self.name = name
+        self.annotation = annotation
+        self.has_default = has_default
+        self.kind = kind
+
+    def __repr__(self) -> str:
+        return "Parameter({!r}, {!r}, has_default={!r})".format(
+            self.name, self.annotation, self.has_default
+        )
+
+
+def parameters(a_type: Callable[..., T]) -> List[Parameter]:
+    """returns the parameters of a callable. Postponed and string annotations are evaluated.
+
+    The parameters of dataclasses, attrs classes, named tuples and typed dicts are read from their fields, including
+    defaults and default factories. For a parameterized generic class `G[A]` the parameters of `G` are returned with
+    its type parameters replaced by `A`"""
+    origin = generic_origin(a_type)
+    if origin is not None:
+        substitutions = dict(
+            zip(getattr(origin, "__parameters__", ()), getattr(a_type, "__args__", ()))
+        )
+        return [
+            Parameter(
+                parameter.name,
+                substitute(parameter.annotation, substitutions),
+                parameter.has_default,
+                parameter.kind,
+            )
+            for parameter in parameters(origin)
+        ]
+    if inspect.isclass(a_type):
+        fields = _field_parameters(a_type)
+        if fields is not None:
+            return fields
+    hints = get_type_hints(a_type)
+    return [
+        Parameter(
+            parameter.name,
+            canonical_annotation(hints.get(parameter.name, parameter.annotation)),
+            parameter.default is not parameter.empty,
+            parameter.kind,
+        )
+        for parameter in _signature(a_type).parameters.values()
+    ]
+
+
+def _signature(a_callable: Callable[..., T]) -> inspect.Signature:
+    """python < 3.9 reports the signature of Generic.__new__ for generic classes, their constructor is read instead"""
+    new = getattr(typing.Generic, "__new__", object.__new__)
+    if (
+        inspect.isclass(a_callable)
+        and new is not object.__new__
+        and getattr(a_callable, "__new__", None) is new
+        and getattr(a_callable, "__init__", object.__init__) is not object.__init__
+    ):
+        init = inspect.signature(getattr(a_callable, "__init__"))
+        return init.replace(parameters=list(init.parameters.values())[1:])
+    return inspect.signature(a_callable)
+
+
+def dependencies(a_type: Callable[..., T]) -> Dict[str, Type[Any]]:
+    """returns dependencies of a callable, see :py:func:`parameters`"""
+    return {parameter.name: parameter.annotation for parameter in parameters(a_type)}
+
+
+def _field_parameters(cls: type) -> Optional[List[Parameter]]:
+    """returns the parameters of classes, whose constructor is generated from fields, or None for other classes"""
+    if (
+        dataclasses is not None
+        and "__dataclass_fields__" in vars(cls)
+        and _has_generated_init(cls)
+    ):
+        return _dataclass_parameters(cls)
+    if attr is not None and attr.has(cls) and _has_generated_init(cls):
+        return _attrs_parameters(cls)
+    if issubclass(cls, tuple) and hasattr(cls, "_fields"):
+        defaults = getattr(cls, "_field_defaults", {})
+        return _annotated(
+            cls, [(name, name, name in defaults) for name in cls._fields]
+        )
+    if issubclass(cls, dict) and hasattr(cls, "__total__"):
+        hints = getattr(cls, "__annotations__", {})
+        required = getattr(
+            cls, "__required_keys__", frozenset(hints) if cls.__total__ else frozenset()
+        )
+        return _annotated(cls, [(name, name, name not in required) for name in hints])
+    return None
+
+
+def _has_generated_init(cls: type) -> bool:
+    """dataclasses and attrs do not replace an __init__ defined in the class"""
+    code = getattr(vars(cls).get("__init__"), "__code__", None)
+    return code is not None and code.co_filename.startswith("<")
+
+
+def _dataclass_parameters(cls: type) -> List[Parameter]:
+    classvar = getattr(dataclasses, "_FIELD_CLASSVAR", None)
+    fields = [
+        field
+        for field in getattr(cls, "__dataclass_fields__").values()
+        if field.init and getattr(field, "_field_type", None) is not classvar
+    ]
+    return _annotated(
+        cls,
+        [
+            (
+                field.name,
+                field.name,
+                field.default is not dataclasses.MISSING
+                or field.default_factory is not dataclasses.MISSING,
+            )
+            for field in fields
+        ],
+    )
+
+
+def _attrs_parameters(cls: type) -> List[Parameter]:
+    return _annotated(
+        cls,
+        [
+            (
+                getattr(attribute, "alias", None) or attribute.name.lstrip("_"),
+                attribute.name,
+                attribute.default is not attr.NOTHING,
+            )
+            for attribute in attr.fields(cls)
+            if attribute.init
+        ],
+    )
+
+
+def _annotated(cls: type, fields: List[Tuple[str, str, bool]]) -> List[Parameter]:
+    """creates parameters from (parameter name, field name, has default) with the evaluated annotations of the
+    fields"""
+    hints = _class_hints(cls)
+    result = []
+    for name, field_name, has_default in fields:
+        annotation = hints.get(field_name, inspect.Parameter.empty)
+        if isinstance(annotation, getattr(dataclasses, "InitVar", ())):
+            annotation = getattr(annotation, "type", inspect.Parameter.empty)
+        result.append(Parameter(name, canonical_annotation(annotation), has_default))
+    return result
+
+
+def _class_hints(cls: type) -> Dict[str, Any]:
+    try:
+        if _HINTS_WITH_EXTRAS:
+            return typing.get_type_hints(cls, include_extras=True)
+        return typing.get_type_hints(cls)
+    except Exception:
+        pass
+    module = sys.modules.get(cls.__module__)
+    global_namespace = getattr(module, "__dict__", {})
+    hints = {}
+    for klass in reversed(inspect.getmro(cls)):
+        for name, annotation in vars(klass).get("__annotations__", {}).items():
+            if isinstance(annotation, str):
+                try:
+                    annotation = eval(annotation, global_namespace, dict(vars(cls)))
+                except Exception:
+                    pass
+            hints[name] = annotation
+    return hints
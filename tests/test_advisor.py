@@ -0,0 +1,78 @@
+import time
+import tracemalloc
+
+import pytest  # type: ignore
+
+from smart_injector import Lifetime
+from smart_injector import create_container
+from smart_injector.advisor import LifetimeAdvisor
+from smart_injector.config.user import Config
+
+
+class Parser:
+    def __init__(self):
+        time.sleep(0.001)
+
+
+class Handler:
+    def __init__(self, first: Parser, second: Parser):
+        self.first = first
+        self.second = second
+
+
+class Report:
+    def __init__(self):
+        self.data = bytearray(2 * 1024 * 1024)
+
+
+class Cheap:
+    pass
+
+
+def configure(config: Config):
+    config.lifetime(Report, Lifetime.SINGLETON)
+    config.lifetime(Cheap, Lifetime.SINGLETON)
+
+
+def test_advisor_recommends_singletons_for_expensive_transients():
+    container = create_container(configure, profile=True)
+    advisor = LifetimeAdvisor(container)
+    for _ in range(3):
+        container.get(Handler)
+    assert advisor.costs()[Parser].count == 6
+    recommendations = advisor.recommendations(requests=3)
+    assert [(r.a_type, r.current, r.lifetime) for r in recommendations] == [
+        (Parser, Lifetime.TRANSIENT, Lifetime.SINGLETON)
+    ]
+    assert recommendations[0].saved_seconds >= 5 * 0.001 / 3
+
+    container.reconfigure(lambda config: recommendations[0].apply(config))
+    handler = container.get(Handler)
+    assert handler.first is handler.second
+
+
+def test_advisor_recommends_transients_for_large_rarely_used_singletons():
+    container = create_container(configure, profile=True)
+    tracemalloc.start()
+    try:
+        container.get(Report)
+        container.get(Cheap)
+    finally:
+        tracemalloc.stop()
+    advisor = LifetimeAdvisor(container)
+    for _ in range(100):
+        container.get(Cheap)
+    assert advisor.uses() == {Cheap: 100}
+    recommendations = advisor.recommendations(requests=100)
+    assert [(r.a_type, r.current, r.lifetime) for r in recommendations] == [
+        (Report, Lifetime.SINGLETON, Lifetime.TRANSIENT)
+    ]
+    assert recommendations[0].saved_bytes >= 2 * 1024 * 1024
+
+    container.get(Report)
+    assert advisor.recommendations(requests=1) == []
+
+
+def test_advisor_requires_a_profile():
+    with pytest.raises(TypeError):
+        LifetimeAdvisor(create_container())
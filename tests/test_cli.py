@@ -0,0 +1,174 @@
+import io
+import time
+from abc import ABC
+from abc import abstractmethod
+from typing import Iterator
+
+import pytest
+
+from smart_injector import Lifetime
+from smart_injector import cli
+from smart_injector.cli import main
+from smart_injector.config.user import Config
+
+
+class Database:
+    pass
+
+
+class Service:
+    def __init__(self, database: Database):
+        self.database = database
+
+
+class Unbound(ABC):
+    @abstractmethod
+    def run(self):
+        pass
+
+
+def configure(config: Config):
+    config.lifetime(Database, Lifetime.SINGLETON)
+    config.lifetime(Service, Lifetime.TRANSIENT)
+
+
+def configure_with_errors(config: Config):
+    configure(config)
+    config.lifetime(Unbound, Lifetime.SINGLETON)
+
+
+def configure_nothing(config: Config):
+    pass
+
+
+def run(*argv: str) -> tuple:
+    out = io.StringIO()
+    return main(list(argv), out), out.getvalue()
+
+
+def test_validate_resolves_configured_types():
+    code, output = run("test_cli:configure", "validate")
+    assert code == 0
+    assert "2 of 2 types resolved" in output
+
+
+def test_validate_fails_without_types_to_resolve():
+    code, output = run("test_cli:configure_nothing", "validate")
+    assert code == 1
+    assert "--root" in output
+
+
+def test_validate_reports_errors():
+    code, output = run("test_cli:configure_with_errors", "validate")
+    assert code == 1
+    assert "FAILED test_cli:Unbound" in output
+
+
+def test_costs_and_singletons_list_constructed_types():
+    code, output = run("test_cli:configure", "costs")
+    assert code == 0
+    assert "test_cli:Service" in output and "test_cli:Database" in output
+    code, output = run("test_cli:configure", "singletons", "--top", "1")
+    assert "test_cli:Database" in output
+    assert "test_cli:Service" not in output
+
+
+def test_bench_reports_throughput_per_root():
+    code, output = run(
+        "test_cli:configure", "--root", "test_cli:Service", "bench", "--number", "10"
+    )
+    assert code == 0
+    assert "ops/sec" in output
+    assert output.strip().endswith("test_cli:Service")
+
+
+def test_bench_measures_a_container_without_profiling(monkeypatch):
+    containers = []
+    original = cli.create_container
+
+    def create_container(*args, **kwargs):
+        containers.append(original(*args, **kwargs))
+        return containers[-1]
+
+    monkeypatch.setattr(cli, "create_container", create_container)
+    run("test_cli:configure", "--root", "test_cli:Service", "bench", "--number", "10")
+    with pytest.raises(TypeError, match="profile=True"):
+        containers[0].construction_costs()
+
+
+class Session:
+    closed = 0
+
+    def close(self):
+        Session.closed += 1
+
+
+def session_factory() -> Iterator[Session]:
+    session = Session()
+    yield session
+    session.close()
+
+
+def configure_resources(config: Config):
+    config.bind(Session, session_factory)
+
+
+@pytest.mark.parametrize(
+    "command, sessions",
+    [
+        (["validate"], 1),
+        (["bench", "--number", "3"], 1 + 3 + 3),
+        (["advise", "--number", "3"], 1 + 3),
+    ],
+)
+def test_transient_resources_are_created_within_a_scope(command, sessions):
+    Session.closed = 0
+    code, output = run(
+        "test_cli:configure_resources", "--root", "test_cli:Session", *command
+    )
+    assert code == 0
+    assert "FAILED" not in output
+    assert Session.closed == sessions
+
+
+class Flaky:
+    created = 0
+
+    def __init__(self):
+        Flaky.created += 1
+        if Flaky.created > 1:
+            raise RuntimeError("created twice")
+
+
+@pytest.mark.parametrize("command", ["bench", "advise"])
+def test_failures_after_validation_are_reported(command):
+    Flaky.created = 0
+    code, output = run("test_cli:configure", "--root", "test_cli:Flaky", command)
+    assert code == 1
+    assert "FAILED test_cli:Flaky: RuntimeError('created twice')" in output
+
+
+@pytest.mark.parametrize("lifetime", ["PARTITIONED", "POOLED", "THREAD"])
+def test_default_lifetime_is_singleton_or_transient(lifetime):
+    with pytest.raises(SystemExit):
+        run("test_cli:configure", "--default-lifetime", lifetime, "validate")
+
+
+class Slow:
+    def __init__(self):
+        time.sleep(0.001)
+
+
+class UsesSlow:
+    def __init__(self, first: Slow, second: Slow):
+        pass
+
+
+def configure_slow(config: Config):
+    config.lifetime(UsesSlow, Lifetime.TRANSIENT)
+
+
+def test_advise_recommends_lifetime_changes():
+    code, output = run("test_cli:configure_slow", "advise", "--number", "5")
+    assert code == 0
+    assert "TRANSIENT -> SINGLETON" in output and "test_cli:Slow" in output
@@ -0,0 +1,92 @@
+import json
+
+import pytest  # type: ignore
+from test_container import F1
+from test_container import F2
+from test_container import MyImplementation
+from test_container import MyInterface
+from test_container import Transient
+from test_container import UseF1
+from test_container import UseF2
+
+from smart_injector.config import user
+from smart_injector.config.file import load_config_file
+from smart_injector.container.factory import create_container
+
+CONFIG = {
+    "bind": [
+        {"type": "test_container:MyInterface", "to": "test_container:MyImplementation"},
+        {"type": "test_container:F", "to": "test_container:F1", "where": "test_container:UseF1"},
+        {"type": "test_container:F", "to": "test_container:F2", "where": "test_container:UseF2"},
+    ],
+    "lifetime": [{"type": "test_container:MyImplementation", "lifetime": "SINGLETON"}],
+    "arguments": [
+        {
+            "type": "test_container:Transient",
+            "values": {"a": 42},
+            "factories": {"b": "test_container:ProvidesInt.get_int_static"},
+        }
+    ],
+}
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / "container.json"
+    path.write_text(json.dumps(CONFIG))
+    return str(path)
+
+
+def assert_configured(container):
+    assert isinstance(container.get(MyInterface), MyImplementation)
+    assert container.get(MyInterface) is container.get(MyInterface)
+    assert isinstance(container.get(UseF1).f, F1)
+    assert isinstance(container.get(UseF2).f, F2)
+    transient = container.get(Transient)
+    assert transient.a == 42
+    assert transient.b == 10
+
+
+def test_create_container_from_config_file(config_file):
+    assert_configured(create_container(config_file=config_file))
+
+
+def test_cached_config_file_is_not_validated_again(config_file, monkeypatch):
+    create_container(config_file=config_file)
+
+    def fail(*args):
+        raise AssertionError("validation should be skipped")
+
+    monkeypatch.setattr(user, "ensure_binding", fail)
+    monkeypatch.setattr(user, "ensure_parameter", fail)
+    assert_configured(create_container(config_file=config_file))
+
+
+def test_changed_config_file_is_validated_again(config_file, tmp_path):
+    create_container(config_file=config_file)
+    changed = dict(CONFIG, bind=[{"type": "test_container:MyInterface", "to": "test_container:A"}])
+    (tmp_path / "container.json").write_text(json.dumps(changed))
+    with pytest.raises(TypeError):
+        create_container(config_file=config_file)
+
+
+def test_config_from_toml_file(tmp_path):
+    pytest.importorskip("tomllib")
+    path = tmp_path / "container.toml"
+    path.write_text(
+        '[[bind]]\ntype = "test_container:MyInterface"\nto = "test_container:MyImplementation"\n'
+    )
+    container = create_container(load_config_file(str(path), cache_dir=str(tmp_path)))
+    assert isinstance(container.get(MyInterface), MyImplementation)
+
+
+def test_toml_values_which_are_not_json_are_not_cached(tmp_path):
+    pytest.importorskip("tomllib")
+    path = tmp_path / "container.toml"
+    path.write_text(
+        '[[arguments]]\ntype = "test_container:Transient"\nvalues = { a = 1979-05-27 }\n'
+    )
+    configure = load_config_file(str(path), cache_dir=str(tmp_path / "cache"))
+    for _ in range(2):
+        assert create_container(configure).get(Transient).a.year == 1979
+    assert not (tmp_path / "cache").exists()
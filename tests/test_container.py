@@ -1,10 +1,31 @@
+import asyncio
+import contextlib
+import gc
+import itertools
+import threading
+import time
+import tracemalloc
+import typing
 from abc import ABC
 from abc import abstractmethod
+from typing import Any
+from typing import AsyncIterator
+from typing import ContextManager
+from typing import Generic
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import TypeVar
+from typing import cast
 
 import pytest  # type: ignore
 
 from smart_injector import Lifetime
 from smart_injector import StaticContainer
+from smart_injector import compile_container
+from smart_injector import inject
+from smart_injector.config import backend
 from smart_injector.config.backend import Bindings
 from smart_injector.config.backend import ConfigBackend
 from smart_injector.config.backend import Dependencies
@@ -15,6 +36,8 @@ from smart_injector.config.backend import method_of_not_created_class
 from smart_injector.config.user import Config
 from smart_injector.container.factory import create_container
 from smart_injector.resolver.resolver import Resolver
+from smart_injector.utility import Annotated
+from smart_injector.utility import parameters
 
 
 class A:
@@ -664,3 +687,1209 @@ def test_method_is_of_a_not_created_class():
     assert method_of_not_created_class(MethodClass().foobar) is False
     assert method_of_not_created_class(some_function) is False
     assert method_of_not_created_class(MethodClass()) is False
+
+
+class MyCached:
+    pass
+
+
+class UseCached1:
+    def __init__(self, cached: MyCached):
+        self.cached = cached
+
+
+class UseCached2:
+    def __init__(self, cached: MyCached):
+        self.cached = cached
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(backend, "monotonic", lambda: now[0])
+    return now
+
+
+def test_cached_lifetime_returns_same_instance_until_ttl_expired(clock):
+    def configure(config: Config):
+        config.lifetime(MyCached, Lifetime.CACHED(ttl=10))
+
+    container = create_container(configure)
+    c1 = container.get(MyCached)
+    clock[0] = 9.0
+    c2 = container.get(MyCached)
+    clock[0] = 10.0
+    c3 = container.get(MyCached)
+    assert c1 is c2
+    assert c3 is not c1
+
+
+def test_cached_lifetime_evicts_least_recently_used_instance():
+    def configure(config: Config):
+        cached = Lifetime.CACHED(maxsize=1)
+        config.lifetime(MyCached, cached, where=UseCached1)
+        config.lifetime(MyCached, cached, where=UseCached2)
+
+    container = create_container(configure)
+    c1 = container.get(UseCached1).cached
+    assert container.get(UseCached1).cached is c1
+    c2 = container.get(UseCached2).cached
+    assert c2 is not c1
+    assert container.get(UseCached1).cached is not c1
+
+
+def test_cached_lifetime_refreshes_expired_instance_in_background(clock):
+    def configure(config: Config):
+        config.lifetime(MyCached, Lifetime.CACHED(ttl=10, refresh=True))
+
+    container = create_container(configure)
+    c1 = container.get(MyCached)
+    clock[0] = 10.0
+    assert container.get(MyCached) is c1
+    for thread in threading.enumerate():
+        if thread is not threading.current_thread() and thread.daemon:
+            thread.join()
+    assert container.get(MyCached) is not c1
+
+
+class SlowCached:
+    created = 0
+
+    def __init__(self):
+        SlowCached.created += 1
+        time.sleep(0.01)
+
+
+def test_cached_lifetime_creates_instance_once_for_concurrent_gets():
+    def configure(config: Config):
+        config.lifetime(SlowCached, Lifetime.CACHED(ttl=60))
+
+    container = create_container(configure)
+    SlowCached.created = 0
+    instances = []
+    threads = [
+        threading.Thread(target=lambda: instances.append(container.get(SlowCached)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert SlowCached.created == 1
+    assert all(instance is instances[0] for instance in instances)
+
+
+def test_lifetime_with_unknown_option_raises_typeerror():
+    with pytest.raises(TypeError):
+        Lifetime.CACHED(foo=1)
+
+
+class MyPooled:
+    pass
+
+
+class NeedsPooled:
+    def __init__(self, pooled: MyPooled):
+        self.pooled = pooled
+
+
+def configure_pooled(config: Config):
+    config.lifetime(MyPooled, Lifetime.POOLED(size=1, timeout=0.01))
+
+
+def test_acquire_reuses_instances_of_pool():
+    container = create_container(configure_pooled)
+    with container.acquire(MyPooled) as p1:
+        assert isinstance(p1, MyPooled)
+    with container.acquire(MyPooled) as p2:
+        assert p2 is p1
+    (metrics,) = container.pool_metrics().values()
+    assert metrics.created == 1
+    assert metrics.checkouts == 2
+    assert metrics.in_use == 0
+
+
+def test_acquire_from_exhausted_pool_times_out():
+    container = create_container(configure_pooled)
+    with container.acquire(MyPooled):
+        with pytest.raises(TimeoutError):
+            with container.acquire(MyPooled):
+                pass
+    (metrics,) = container.pool_metrics().values()
+    assert metrics.waits == 1
+
+
+def test_acquire_waits_for_released_instance():
+    def configure(config: Config):
+        config.lifetime(MyPooled, Lifetime.POOLED(size=1))
+
+    container = create_container(configure)
+    lease = container.acquire(MyPooled)
+    p1 = lease.__enter__()
+    threading.Timer(0.01, lease.__exit__).start()
+    with container.acquire(MyPooled) as p2:
+        assert p2 is p1
+
+
+def test_pooled_instances_cannot_be_injected():
+    container = create_container(configure_pooled)
+    with pytest.raises(TypeError):
+        container.get(NeedsPooled)
+
+
+def test_acquire_of_an_unpooled_type_releases_pooled_dependencies():
+    container = create_container(configure_pooled)
+    with pytest.raises(TypeError):
+        with container.acquire(NeedsPooled):
+            pass
+    (metrics,) = container.pool_metrics().values()
+    assert metrics.in_use == 0
+    with container.acquire(MyPooled) as pooled:
+        assert isinstance(pooled, MyPooled)
+
+
+def test_reconfigure_creates_new_pools():
+    def configure(config: Config):
+        config.bind(MyInterface, MyImplementation)
+        config.lifetime(MyInterface, Lifetime.POOLED(size=1, timeout=0.01))
+
+    def reconfigure(config: Config):
+        config.bind(MyInterface, MyImplementation2)
+        config.lifetime(MyInterface, Lifetime.POOLED(size=2, timeout=0.01))
+
+    container = create_container(configure)
+    with container.acquire(MyInterface) as idle:
+        assert type(idle) is MyImplementation
+    lease = container.acquire(MyInterface)
+    lease.__enter__()
+    container.reconfigure(reconfigure)
+    with container.acquire(MyInterface) as first, container.acquire(
+        MyInterface
+    ) as second:
+        assert type(first) is MyImplementation2
+        assert type(second) is MyImplementation2
+    lease.__exit__(None, None, None)
+    (metrics,) = container.pool_metrics().values()
+    assert metrics.size == 2
+
+
+def test_acquire_with_async_context_manager():
+    container = create_container(configure_pooled)
+
+    async def use_pool():
+        async with container.acquire(MyPooled) as pooled:
+            return pooled
+
+    loop = asyncio.new_event_loop()
+    try:
+        assert isinstance(loop.run_until_complete(use_pool()), MyPooled)
+    finally:
+        loop.close()
+
+
+def test_bind_to_import_string():
+    def configure(config: Config):
+        config.bind(MyInterface, "test_container:MyImplementation")
+
+    container = create_container(configure)
+    assert isinstance(container.get(MyInterface), MyImplementation)
+
+
+def test_import_string_binding_is_imported_and_validated_on_first_resolve():
+    def configure(config: Config):
+        config.bind(MyBaseClass, "test_container:NotASubclass")
+        config.bind(MyInterface, "not_existing_module:MyImplementation")
+
+    container = create_container(configure)
+    with pytest.raises(TypeError):
+        container.get(MyBaseClass)
+    with pytest.raises(ImportError):
+        container.get(MyInterface)
+
+
+def test_arg_factory_as_import_string():
+    def configure(config: Config):
+        config.arg_factory(NeedsInt, a_int="test_container:ProvidesInt.get_int")
+
+    container = create_container(configure)
+    assert container.get(NeedsInt).a_int == 42
+
+
+class UsesStringAnnotations:
+    def __init__(self, ab: "AB", c: "C"):
+        self.ab = ab
+        self.c = c
+
+
+def string_annotated_factory(c: "C") -> "MyImplementation":
+    return MyImplementation()
+
+
+def test_string_annotations_are_resolved(container: StaticContainer):
+    instance = container.get(UsesStringAnnotations)
+    assert isinstance(instance.ab.a, A)
+    assert isinstance(instance.c, C)
+
+
+def test_bind_to_callable_with_string_return_annotation():
+    def configure(config: Config):
+        config.bind(MyInterface, string_annotated_factory)
+
+    container = create_container(configure)
+    assert isinstance(container.get(MyInterface), MyImplementation)
+
+
+def test_evaluated_annotations_are_cached():
+    signatures = backend.Signatures()
+    assert signatures.dependencies(UsesStringAnnotations) == {"ab": AB, "c": C}
+    assert signatures.dependencies(UsesStringAnnotations) == {"ab": AB, "c": C}
+    assert signatures.hits == 1
+    assert signatures.misses == 1
+    signatures.invalidate(UsesStringAnnotations)
+    signatures.dependencies(UsesStringAnnotations)
+    assert signatures.misses == 2
+
+
+class Plugin(ABC):
+    @abstractmethod
+    def name(self) -> str:
+        pass
+
+
+class PluginA(Plugin):
+    def name(self) -> str:
+        return "a"
+
+
+class PluginB(Plugin):
+    def name(self) -> str:
+        return "b"
+
+
+class Pipeline:
+    def __init__(self, plugins: List[Plugin]):
+        self.plugins = plugins
+
+
+class OtherPipeline:
+    def __init__(self, plugins: List[Plugin]):
+        self.plugins = plugins
+
+
+def configure_multibinding(config: Config):
+    config.add_to(Plugin, PluginA)
+    config.add_to(Plugin, PluginB)
+    config.lifetime(PluginB, Lifetime.SINGLETON)
+    config.add_to(Plugin, PluginB, where=OtherPipeline)
+
+
+def test_multibinding_injects_all_members():
+    container = create_container(configure_multibinding)
+    pipeline = container.get(Pipeline)
+    assert [plugin.name() for plugin in pipeline.plugins] == ["a", "b"]
+    assert pipeline.plugins[1] is container.get(Pipeline).plugins[1]
+    assert pipeline.plugins[0] is not container.get(Pipeline).plugins[0]
+    assert [plugin.name() for plugin in container.get(OtherPipeline).plugins] == ["b"]
+
+
+def test_multibinding_list_is_cached_by_lifetime():
+    def configure(config: Config):
+        configure_multibinding(config)
+        config.lifetime(List[Plugin], Lifetime.SINGLETON)
+
+    container = create_container(configure)
+    assert container.get(Pipeline).plugins is container.get(Pipeline).plugins
+
+
+def test_multibinding_without_members_injects_empty_list(container: StaticContainer):
+    assert container.get(Pipeline).plugins == []
+
+
+def test_add_a_non_subclass_raises_typeerror():
+    with pytest.raises(TypeError):
+        create_container(lambda config: config.add_to(Plugin, NotASubclass))
+
+
+class Engine:
+    def __init__(self, url: str):
+        self.url = url
+
+
+class SqlEngine(Engine):
+    pass
+
+
+class Repository:
+    def __init__(
+        self,
+        primary: Engine,
+        replica: Annotated[Engine, "replica"],
+        url: Annotated[str, "url"],
+    ):
+        self.primary = primary
+        self.replica = replica
+        self.url = url
+
+
+REPLICA = Engine("replica")
+
+
+def configure_named(config: Config):
+    config.arguments(Engine, url="primary")
+    config.instance(Engine, REPLICA, name="replica")
+    config.instance(str, "sqlite://", name="url")
+
+
+def test_named_instances_are_injected_for_annotated_parameters():
+    container = create_container(configure_named)
+    repository = container.get(Repository)
+    assert repository.primary.url == "primary"
+    assert repository.replica is REPLICA
+    assert repository.url == "sqlite://"
+
+
+def test_named_binding_and_lifetime():
+    def configure(config: Config):
+        config.bind(Engine, SqlEngine, name="replica")
+        config.lifetime(Engine, Lifetime.SINGLETON, name="replica")
+
+    container = create_container(configure)
+    r1 = container.get(Repository)
+    r2 = container.get(Repository)
+    assert isinstance(r1.replica, SqlEngine)
+    assert not isinstance(r1.primary, SqlEngine)
+    assert r1.replica is r2.replica
+    assert r1.primary is not r2.primary
+
+
+def test_annotated_type_without_configuration_resolves_type(container: StaticContainer):
+    assert container.get(Repository).replica.url == ""
+
+
+class UsesF:
+    def __init__(self, f: F, interface: MyInterface):
+        self.f = f
+        self.interface = interface
+
+
+class MyImplementation2(MyInterface):
+    def foobar(self):
+        pass
+
+
+def configure_reconfigurable(config: Config):
+    config.bind(F, F1)
+    config.bind(MyInterface, MyImplementation)
+    config.lifetime(MySingleton, Lifetime.SINGLETON)
+    config.instance(MyInstance, MY_INSTANCE_INSTANCE)
+
+
+def reconfigure(config: Config):
+    config.bind(F, F2)
+    config.bind(MyInterface, MyImplementation2)
+
+
+def test_reconfigure_applies_changes_with_a_single_epoch():
+    container = create_container(configure_reconfigurable)
+    singleton = container.get(MySingleton)
+    epoch = container.epoch
+    container.reconfigure(reconfigure)
+    assert container.epoch == epoch + 1
+    uses_f = container.get(UsesF)
+    assert isinstance(uses_f.f, F2)
+    assert isinstance(uses_f.interface, MyImplementation2)
+    assert container.get(MySingleton) is not singleton
+    assert container.get(MyInstance) is MY_INSTANCE_INSTANCE
+
+
+def test_concurrent_get_sees_either_old_or_new_configuration():
+    container = create_container(configure_reconfigurable)
+    mixed = []
+    stop = threading.Event()
+
+    def resolve():
+        while not stop.is_set():
+            uses_f = container.get(UsesF)
+            if isinstance(uses_f.f, F2) != isinstance(uses_f.interface, MyImplementation2):
+                mixed.append(uses_f)
+
+    threads = [threading.Thread(target=resolve) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for _ in range(50):
+        container.reconfigure(reconfigure)
+        container.reconfigure(configure_reconfigurable)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert mixed == []
+
+
+def test_reconfigure_must_not_declare_dependencies():
+    container = create_container()
+    with pytest.raises(TypeError):
+        container.reconfigure(lambda config: config.dependency(Dependecy))
+
+
+def test_config_changes_increase_epoch():
+    configs = []
+    container = create_container(configs.append)
+    epoch = container.epoch
+    configs[0].bind(MyInterface, MyImplementation)
+    assert container.epoch == epoch + 1
+
+
+def test_arguments_within_a_context_do_not_change_global_arguments():
+    def configure(config: Config):
+        config.arguments(Transient, a=1)
+        config.arguments(Transient, b=2.0, where=UseT1)
+
+    container = create_container(configure)
+    assert container.get(Transient).b == 0.0
+
+
+class MyConnection:
+    pass
+
+
+class NeedsConnection:
+    def __init__(self, connection: MyConnection):
+        self.connection = connection
+
+
+def test_thread_lifetime_creates_one_instance_per_thread():
+    def configure(config: Config):
+        config.lifetime(MyConnection, Lifetime.THREAD)
+
+    container = create_container(configure)
+    c1 = container.get(NeedsConnection).connection
+    assert container.get(NeedsConnection).connection is c1
+    others = []
+    thread = threading.Thread(
+        target=lambda: others.extend(container.get(MyConnection) for _ in range(2))
+    )
+    thread.start()
+    thread.join()
+    assert others[0] is others[1]
+    assert others[0] is not c1
+
+
+def test_stats_count_singletons_config_entries_and_cache_hits():
+    def configure(config: Config):
+        config.lifetime(MyConnection, Lifetime.SINGLETON)
+        config.arguments(NeedsConnection, where=AB, connection=None)
+
+    container = create_container(configure)
+    container.get(NeedsConnection)
+    container.get(NeedsConnection)
+    stats = container.stats()
+    assert stats.singletons == {MyConnection: 1}
+    assert stats.singleton_sizes == {}
+    assert stats.config["lifetimes"].entries == 1
+    assert stats.config["factory_args"].contexts == 1
+    assert stats.config["factory_args"].context_entries == 1
+    assert stats.config["factory_args"].empty_contexts == 0
+    assert stats.caches["signatures"].hits > 0
+    assert 0 < stats.caches["signatures"].hit_rate < 1
+
+
+def test_stats_report_singleton_sizes_while_tracing():
+    class Big:
+        def __init__(self):
+            self.data = bytearray(100000)
+
+    def configure(config: Config):
+        config.lifetime(Big, Lifetime.SINGLETON)
+
+    container = create_container(configure)
+    tracemalloc.start()
+    try:
+        container.get(Big)
+    finally:
+        tracemalloc.stop()
+    assert container.stats().singleton_sizes[Big] >= 100000
+
+
+def test_inject_passes_instances_to_annotated_parameters():
+    def configure(config: Config):
+        config.lifetime(MyConnection, Lifetime.SINGLETON)
+
+    container = create_container(configure)
+
+    @container.inject
+    def handle(request, connection: MyConnection, ab: AB, limit: int = 10):
+        return request, connection, ab, limit
+
+    request, connection, ab, limit = handle("request")
+    assert request == "request"
+    assert connection is container.get(MyConnection)
+    assert isinstance(ab, AB)
+    assert limit == 10
+    assert handle("request", ab=None)[2] is None
+    assert handle("request", None)[1] is None
+    assert handle.__name__ == "handle"
+
+
+def test_inject_decorator_for_coroutine_functions():
+    container = create_container()
+
+    @inject(container)
+    async def handle(a: A) -> A:
+        return a
+
+    loop = asyncio.new_event_loop()
+    try:
+        assert isinstance(loop.run_until_complete(handle()), A)
+    finally:
+        loop.close()
+
+
+def test_inject_uses_configuration_changes():
+    container = create_container()
+
+    @container.inject
+    def handle(a: A) -> A:
+        return a
+
+    class MyA(A):
+        pass
+
+    assert type(handle()) is A
+    container.reconfigure(lambda config: config.bind(A, MyA))
+    assert type(handle()) is MyA
+    assert container.stats().caches["plans"].size == 1
+
+
+def test_factory_creates_new_instances_with_overrides():
+    def configure(config: Config):
+        config.lifetime(MyConnection, Lifetime.SINGLETON)
+
+    container = create_container(configure)
+    make = container.factory(NeedsConnection)
+    first, second = make(), make()
+    assert first is not second
+    assert first.connection is second.connection is container.get(MyConnection)
+    other = MyConnection()
+    assert make(connection=other).connection is other
+
+
+def test_factory_rejects_invalid_overrides():
+    def configure(config: Config):
+        config.lifetime(MyConnection, Lifetime.SINGLETON)
+
+    container = create_container(configure)
+    with pytest.raises(TypeError):
+        container.factory(NeedsConnection)(unknown=1)
+    with pytest.raises(TypeError):
+        container.factory(MyConnection)(connection=1)
+
+
+class Record:
+    def __init__(self, connection: MyConnection, ab: AB, record: str):
+        self.connection = connection
+        self.ab = ab
+        self.record = record
+
+
+def test_create_many_shares_singletons_and_creates_transients():
+    def configure(config: Config):
+        config.lifetime(MyConnection, Lifetime.SINGLETON)
+        config.arguments(Record, record="default")
+
+    container = create_container(configure)
+    records = container.create_many(Record, 3)
+    assert len(records) == 3
+    assert len({id(record.ab) for record in records}) == 3
+    assert all(record.connection is container.get(MyConnection) for record in records)
+    assert all(record.record == "default" for record in records)
+
+
+def test_iter_many_uses_overrides_per_item():
+    container = create_container()
+    records = container.iter_many(
+        Record, overrides=({"record": str(i)} for i in range(1000))
+    )
+    assert [record.record for record in itertools.islice(records, 3)] == ["0", "1", "2"]
+    limited = container.create_many(Record, 2, iter([{"record": "a"}] * 5))
+    assert [record.record for record in limited] == ["a", "a"]
+    with pytest.raises(TypeError):
+        container.create_many(Record)
+
+
+def test_eager_singletons_are_created_in_the_background():
+    created = threading.Event()
+    release = threading.Event()
+    instances = []
+
+    class Slow:
+        def __init__(self):
+            instances.append(self)
+            created.set()
+            release.wait(5)
+
+    def configure(config: Config):
+        config.lifetime(Slow, Lifetime.SINGLETON(eager=True))
+
+    container = create_container(configure)
+    assert created.wait(5)
+    waiting = threading.Thread(target=lambda: instances.append(container.get(Slow)))
+    waiting.start()
+    release.set()
+    waiting.join()
+    assert len(instances) == 2
+    assert instances[0] is instances[1]
+
+
+def test_eager_singletons_are_created_again_after_reconfigure():
+    def configure(config: Config):
+        config.lifetime(MyConnection, Lifetime.SINGLETON(eager=True))
+
+    container = create_container(configure)
+    first = container.get(MyConnection)
+    futures = container.start_eager_singletons()
+    assert [future.result(5) for future in futures] == [first]
+    container.reconfigure(lambda config: None)
+    assert container.get(MyConnection) is not first
+
+
+class Session:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class UsesSession:
+    def __init__(self, session: Session):
+        self.session = session
+
+
+def session_factory() -> Iterator[Session]:
+    session = Session()
+    yield session
+    session.closed = True
+
+
+def test_generator_factory_is_cleaned_up_when_scope_closes():
+    container = create_container(lambda config: config.bind(Session, session_factory))
+    with container.scope() as scope:
+        session = scope.get(UsesSession).session
+        assert not session.closed
+    assert session.closed
+
+
+def test_resources_of_singletons_are_owned_by_the_container():
+    def configure(config: Config):
+        config.bind(Session, session_factory)
+        config.lifetime(Session, Lifetime.SINGLETON)
+
+    container = create_container(configure)
+    with container.scope() as scope:
+        session = scope.get(UsesSession).session
+    assert not session.closed
+    container.close()
+    assert session.closed
+
+
+def test_transient_resources_require_a_scope():
+    container = create_container(lambda config: config.bind(Session, session_factory))
+    with pytest.raises(TypeError, match="scope"):
+        container.get(Session)
+    with pytest.raises(TypeError, match="scope"):
+        container.factory(UsesSession)()
+    assert len(container._StaticContainer__backend.resources.container) == 0
+
+
+def test_scope_owns_resources_of_factories_and_injected_functions():
+    container = create_container(lambda config: config.bind(Session, session_factory))
+
+    @container.inject
+    def handle(uses: UsesSession) -> Session:
+        return uses.session
+
+    with container.scope():
+        created = container.factory(UsesSession)().session
+        many = [uses.session for uses in container.create_many(UsesSession, n=2)]
+        injected = handle()
+        assert not created.closed and not injected.closed
+    assert created.closed and injected.closed
+    assert all(session.closed for session in many)
+    with pytest.raises(TypeError, match="scope"):
+        handle()
+
+
+def test_resources_of_thread_instances_are_closed_when_the_thread_exits():
+    def configure(config: Config):
+        config.bind(Session, session_factory)
+        config.lifetime(Session, Lifetime.THREAD)
+
+    container = create_container(configure)
+    sessions = []
+    for _ in range(5):
+        thread = threading.Thread(target=lambda: sessions.append(container.get(Session)))
+        thread.start()
+        thread.join()
+    gc.collect()
+    assert [session.closed for session in sessions] == [True] * 5
+    assert len(container._StaticContainer__backend.resources.container) == 0
+
+
+def test_context_manager_factories_for_arguments():
+    @contextlib.contextmanager
+    def open_session() -> Iterator[Session]:
+        session = Session()
+        yield session
+        session.closed = True
+
+    def closing_session() -> ContextManager[Session]:
+        return contextlib.closing(Session())
+
+    container = create_container(
+        lambda config: config.arg_factory(UsesSession, session=open_session)
+    )
+    with container.scope() as scope:
+        session = scope.get(UsesSession).session
+        assert isinstance(session, Session)
+    assert session.closed
+    container = create_container(lambda config: config.bind(Session, closing_session))
+    with container.scope() as scope:
+        assert type(scope.get(Session)) is Session
+
+
+def test_async_generator_factories_run_on_the_callers_loop():
+    loops = []
+
+    async def async_session() -> AsyncIterator[Session]:
+        loops.append(asyncio.get_event_loop())
+        session = Session()
+        yield session
+        session.closed = True
+
+    def configure_singleton(config: Config):
+        config.bind(Session, async_session)
+        config.lifetime(Session, Lifetime.SINGLETON)
+
+    container = create_container(lambda config: config.bind(Session, async_session))
+
+    async def use_scope() -> Session:
+        async with container.scope() as scope:
+            session = (await scope.aget(UsesSession)).session
+            assert not session.closed
+        return session
+
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(use_scope()).closed
+        assert loops == [loop]
+        with pytest.raises(TypeError):
+            loop.run_until_complete(container.aget(Session))
+        singletons = create_container(configure_singleton)
+        session = loop.run_until_complete(singletons.aget(Session))
+        with pytest.raises(TypeError):
+            singletons.close()
+        loop.run_until_complete(singletons.aclose())
+        assert session.closed
+    finally:
+        loop.close()
+    with pytest.raises(TypeError, match="aget"):
+        with container.scope() as scope:
+            scope.get(Session)
+
+
+class TenantSettings:
+    def __init__(self, name: str):
+        self.name = name
+
+
+class TenantService:
+    def __init__(self, settings: TenantSettings, connection: MyConnection):
+        self.settings = settings
+        self.connection = connection
+
+
+def test_container_template_creates_isolated_containers():
+    def configure(config: Config):
+        config.dependency(TenantSettings)
+        config.lifetime(MyConnection, Lifetime.SINGLETON)
+
+    template = compile_container(configure)
+    first = template.instantiate(dependencies=[TenantSettings("a")])
+    second = template.instantiate(dependencies=[TenantSettings("b")])
+    assert first.get(TenantService).settings.name == "a"
+    assert second.get(TenantService).settings.name == "b"
+    assert first.get(MyConnection) is first.get(TenantService).connection
+    assert first.get(MyConnection) is not second.get(MyConnection)
+    with pytest.raises(TypeError):
+        template.instantiate()
+
+
+class TenantClient:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_partitioned_lifetime_keeps_one_instance_per_key():
+    contextvars = pytest.importorskip("contextvars")
+    tenant = contextvars.ContextVar("tenant")
+
+    def configure(config: Config):
+        config.lifetime(TenantClient, Lifetime.PARTITIONED(key=tenant, maxsize=2))
+
+    container = create_container(configure)
+    tenant.set("a")
+    a = container.get(TenantClient)
+    assert container.get(TenantClient) is a
+    tenant.set("b")
+    b = container.get(TenantClient)
+    assert b is not a
+    tenant.set("c")
+    container.get(TenantClient)
+    assert a.closed and not b.closed
+    tenant.set("a")
+    assert container.get(TenantClient) is not a
+
+
+def test_partitioned_lifetime_with_key_function_and_eviction_callback():
+    keys = iter(["x", "y", "x"])
+    evicted = []
+
+    def configure(config: Config):
+        config.lifetime(
+            TenantClient,
+            Lifetime.PARTITIONED(
+                key=lambda: next(keys), maxsize=1, on_evict=evicted.append
+            ),
+        )
+
+    container = create_container(configure)
+    x = container.get(TenantClient)
+    container.get(TenantClient)
+    assert evicted == [x]
+    assert not x.closed
+    with pytest.raises(TypeError):
+        Lifetime.PARTITIONED()
+
+
+class CountingClient:
+    closes = 0
+
+    def close(self):
+        CountingClient.closes += 1
+
+
+def counting_client() -> Iterator[CountingClient]:
+    client = CountingClient()
+    yield client
+    client.close()
+
+
+def test_resources_of_evicted_partitions_are_closed_once():
+    tenants = iter(range(50))
+
+    def configure(config: Config):
+        config.bind(CountingClient, counting_client)
+        config.lifetime(
+            CountingClient, Lifetime.PARTITIONED(key=lambda: next(tenants), maxsize=2)
+        )
+
+    container = create_container(configure)
+    CountingClient.closes = 0
+    for _ in range(50):
+        container.get(CountingClient)
+    assert CountingClient.closes == 48
+    assert len(container._StaticContainer__backend.resources.container) == 1
+    container.close()
+    assert CountingClient.closes == 50
+
+
+def test_resources_of_expired_and_evicted_cached_instances_are_closed(clock):
+    def configure(config: Config):
+        cached = Lifetime.CACHED(ttl=10, maxsize=1)
+        config.bind(CountingClient, counting_client)
+        config.lifetime(CountingClient, cached)
+        config.lifetime(MyCached, cached)
+
+    container = create_container(configure)
+    CountingClient.closes = 0
+    container.get(CountingClient)
+    clock[0] = 10.0
+    container.get(CountingClient)
+    assert CountingClient.closes == 1
+    container.get(MyCached)
+    assert CountingClient.closes == 2
+    container.get(CountingClient)
+    container.close()
+    assert CountingClient.closes == 3
+
+
+GenericT = TypeVar("GenericT")
+
+
+class User:
+    pass
+
+
+class Order:
+    pass
+
+
+class GenericRepository(Generic[GenericT], ABC):
+    @abstractmethod
+    def item_type(self) -> Any:
+        pass
+
+
+class SqlGenericRepository(GenericRepository[GenericT]):
+    def __init__(self, items: List[GenericT]):
+        self.items = items
+
+    def item_type(self) -> Any:
+        return self.__orig_class__.__args__[0]
+
+
+class UserGenericRepository(GenericRepository[User]):
+    def item_type(self) -> Any:
+        return User
+
+
+class Shop:
+    def __init__(
+        self, users: GenericRepository[User], orders: GenericRepository[Order]
+    ):
+        self.users = users
+        self.orders = orders
+
+
+def test_generic_bindings_for_specific_and_all_type_arguments():
+    def configure(config: Config):
+        config.bind(GenericRepository[GenericT], SqlGenericRepository[GenericT])
+        config.bind(GenericRepository[User], UserGenericRepository)
+
+    container = create_container(configure)
+    shop = container.get(Shop)
+    assert type(shop.users) is UserGenericRepository
+    assert type(shop.orders) is SqlGenericRepository
+    assert shop.orders.item_type() is Order
+    assert shop.orders.items == []
+
+
+def test_generic_bindings_require_matching_type_arguments():
+    with pytest.raises(TypeError):
+        create_container(
+            lambda config: config.bind(
+                GenericRepository[User], SqlGenericRepository[Order]
+            )
+        )
+    with pytest.raises(TypeError):
+        create_container(
+            lambda config: config.bind(GenericRepository[Order], UserGenericRepository)
+        )
+    create_container(
+        lambda config: config.bind(GenericRepository[User], SqlGenericRepository[User])
+    )
+    create_container(
+        lambda config: config.bind(GenericRepository[User], SqlGenericRepository)
+    )
+
+
+def test_binding_of_generic_origin_must_match_the_requested_type_arguments():
+    container = create_container(
+        lambda config: config.bind(GenericRepository, UserGenericRepository)
+    )
+    assert type(container.get(GenericRepository[User])) is UserGenericRepository
+    with pytest.raises(TypeError, match="no subclass"):
+        container.get(GenericRepository[Order])
+
+
+def test_generic_class_without_binding_is_resolved_with_its_type_arguments():
+    def configure(config: Config):
+        config.lifetime(SqlGenericRepository[User], Lifetime.SINGLETON)
+
+    container = create_container(configure)
+    users = container.get(SqlGenericRepository[User])
+    assert users.item_type() is User
+    assert container.get(SqlGenericRepository[User]) is users
+    assert container.get(SqlGenericRepository[Order]) is not users
+    with pytest.raises(TypeError):
+        container.get(GenericRepository[Order])
+
+
+class TupleService(NamedTuple):
+    connection: MyConnection
+    retries: int = 3
+
+
+def test_parameters_of_dataclasses_are_read_from_fields():
+    dataclasses = pytest.importorskip("dataclasses")
+
+    @dataclasses.dataclass
+    class DataService:
+        connection: "MyConnection"
+        tags: List[str] = dataclasses.field(default_factory=list)
+        retries: int = 3
+
+    data = backend.Signatures().parameters(DataService)
+    assert [(p.name, p.annotation, p.has_default) for p in data] == [
+        ("connection", MyConnection, False),
+        ("tags", List[str], True),
+        ("retries", int, True),
+    ]
+    assert isinstance(create_container().get(DataService).connection, MyConnection)
+
+
+def test_parameters_of_named_tuples_are_read_from_fields():
+    named_tuple = backend.Signatures().parameters(TupleService)
+    assert [(p.name, p.annotation, p.has_default) for p in named_tuple] == [
+        ("connection", MyConnection, False),
+        ("retries", int, True),
+    ]
+    assert isinstance(create_container().get(TupleService).connection, MyConnection)
+
+
+def test_parameters_of_typed_dicts():
+    if not hasattr(typing, "TypedDict"):
+        pytest.skip("TypedDict requires python 3.8")
+
+    class Options(typing.TypedDict, total=False):
+        connection: MyConnection
+
+    assert [(p.name, p.has_default) for p in parameters(Options)] == [
+        ("connection", True)
+    ]
+
+
+def test_parameters_of_attrs_classes():
+    attr = pytest.importorskip("attr")
+
+    @attr.s(auto_attribs=True)
+    class AttrsService:
+        _connection: MyConnection
+        retries: int = 3
+
+    assert [(p.name, p.annotation, p.has_default) for p in parameters(AttrsService)] == [
+        ("connection", MyConnection, False),
+        ("retries", int, True),
+    ]
+
+
+class WithDefaults:
+    def __init__(
+        self,
+        connection: MyConnection,
+        *args: Any,
+        backup: MyConnection = None,
+        timeout: float = 30.0,
+        **kwargs: Any
+    ):
+        self.connection = connection
+        self.backup = backup
+        self.timeout = timeout
+        self.args = args
+        self.kwargs = kwargs
+
+
+def test_parameters_with_defaults_and_variadic_parameters_are_not_injected():
+    container = create_container()
+    instance = container.get(WithDefaults)
+    assert isinstance(instance.connection, MyConnection)
+    assert instance.backup is None
+    assert instance.timeout == 30.0
+    assert instance.args == ()
+    assert instance.kwargs == {}
+    assert container.factory(WithDefaults)().timeout == 30.0
+
+
+def test_parameters_with_defaults_are_injected_if_configured():
+    def configure(config: Config):
+        config.lifetime(MyConnection, Lifetime.SINGLETON, where=WithDefaults)
+        config.arguments(WithDefaults, timeout=1.0)
+
+    container = create_container(configure)
+    instance = container.get(WithDefaults)
+    assert isinstance(instance.backup, MyConnection)
+    assert instance.timeout == 1.0
+    assert container.factory(WithDefaults)().backup is instance.backup
+
+
+def test_parameters_with_defaults_can_be_overridden():
+    container = create_container()
+    instance = container.factory(WithDefaults)(timeout=5.0)
+    assert instance.timeout == 5.0
+    assert isinstance(instance.connection, MyConnection)
+    instances = container.create_many(
+        WithDefaults, overrides=[{"timeout": 1.0}, {"backup": None}]
+    )
+    assert [instance.timeout for instance in instances] == [1.0, 30.0]
+    with pytest.raises(TypeError):
+        container.factory(WithDefaults)(args=())
+
+
+def test_unannotated_parameters_require_an_argument():
+    class Unannotated:
+        def __init__(self, url, retries=3):
+            self.url = url
+            self.retries = retries
+
+    with pytest.raises(TypeError, match="url"):
+        create_container().get(Unannotated)
+
+    def configure(config: Config):
+        config.arguments(Unannotated, url="sqlite://")
+
+    instance = create_container(configure).get(Unannotated)
+    assert (instance.url, instance.retries) == ("sqlite://", 3)
+
+
+class Integration:
+    pass
+
+
+class UsesIntegration:
+    def __init__(self, integration: Optional[Integration]):
+        self.integration = integration
+
+
+def test_singletons_which_are_none_are_created_once():
+    calls = []
+
+    def disabled_integration() -> Integration:
+        calls.append(1)
+        return cast(Integration, None)
+
+    def configure(config: Config):
+        config.bind(Integration, disabled_integration)
+        config.lifetime(Integration, Lifetime.SINGLETON)
+
+    container = create_container(configure)
+    assert container.get(Integration) is None
+    assert container.get(UsesIntegration).integration is None
+    assert container.factory(UsesIntegration)().integration is None
+    assert len(calls) == 1
+
+
+def test_optional_parameters_are_none_unless_their_type_was_configured():
+    container = create_container()
+    assert container.get(UsesIntegration).integration is None
+    assert container.get(Optional[Integration]) is None
+    assert container.factory(UsesIntegration)().integration is None
+
+    container = create_container(
+        lambda config: config.lifetime(Integration, Lifetime.SINGLETON)
+    )
+    integration = container.get(Integration)
+    assert container.get(UsesIntegration).integration is integration
+    assert container.factory(UsesIntegration)().integration is integration
+
+
+def test_default_factory_of_context_config_is_only_called_for_missing_entries():
+    calls = []
+    config = backend.ContextConfig(lambda entry: calls.append(entry))
+    config.set(backend.ConfigEntry(A), 1)
+    assert config.get(backend.ConfigEntry(A, where=B)) == 1
+    assert calls == []
+    config.get(backend.ConfigEntry(B))
+    assert calls == [backend.ConfigEntry(B)]
@@ -0,0 +1,171 @@
+import os
+import sys
+
+import pytest  # type: ignore
+
+from smart_injector import Config
+from smart_injector import create_container
+
+INTERFACES = """
+from abc import ABC, abstractmethod
+
+class Repository(ABC):
+    @abstractmethod
+    def load(self):
+        pass
+
+class Service(ABC):
+    @abstractmethod
+    def run(self):
+        pass
+"""
+
+REPOSITORY = """
+from smart_injector import injectable
+from scanned.interfaces import Repository
+
+@injectable
+class SqlRepository(Repository):
+    def load(self):
+        pass
+"""
+
+SERVICE = """
+from scanned.base import Plugin
+from scanned.interfaces import Service
+
+class MyService(Service, Plugin):
+    def run(self):
+        pass
+"""
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    root = tmp_path / "scanned"
+    (root / "impl").mkdir(parents=True)
+    (root / "__init__.py").write_text("")
+    (root / "base.py").write_text("class Plugin:\n    pass\n")
+    (root / "interfaces.py").write_text(INTERFACES)
+    (root / "impl" / "__init__.py").write_text("")
+    (root / "impl" / "repository.py").write_text(REPOSITORY)
+    (root / "impl" / "service.py").write_text(SERVICE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield root
+    for name in list(sys.modules):
+        if name.startswith("scanned"):
+            del sys.modules[name]
+
+
+def forget_implementations():
+    for name in list(sys.modules):
+        if name.startswith("scanned.impl"):
+            del sys.modules[name]
+
+
+def configure_scan(config: Config):
+    from scanned.base import Plugin
+
+    config.scan("scanned", base=Plugin)
+
+
+def test_scan_binds_interfaces_of_injectable_classes(package):
+    container = create_container(configure_scan)
+    from scanned.interfaces import Repository
+    from scanned.interfaces import Service
+
+    assert type(container.get(Repository)).__name__ == "SqlRepository"
+    assert type(container.get(Service)).__name__ == "MyService"
+
+
+def test_scan_uses_index_for_unchanged_modules(package):
+    create_container(configure_scan)
+    forget_implementations()
+    container = create_container(configure_scan)
+    assert "scanned.impl.repository" not in sys.modules
+    from scanned.interfaces import Repository
+
+    container.get(Repository)
+    assert "scanned.impl.repository" in sys.modules
+
+
+def test_scan_imports_changed_modules_again(package):
+    create_container(configure_scan)
+    forget_implementations()
+    path = str(package / "impl" / "repository.py")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    create_container(configure_scan)
+    assert "scanned.impl.repository" in sys.modules
+    assert "scanned.impl.service" not in sys.modules
+
+
+def test_scan_with_two_implementations_raises_typeerror_when_resolved(package):
+    (package / "impl" / "other.py").write_text(
+        REPOSITORY.replace("SqlRepository", "OtherRepository")
+    )
+    container = create_container(configure_scan)
+    from scanned.interfaces import Repository
+    from scanned.interfaces import Service
+
+    assert type(container.get(Service)).__name__ == "MyService"
+    with pytest.raises(TypeError, match="OtherRepository and .*SqlRepository"):
+        container.get(Repository)
+
+
+LAYERED = """
+from abc import abstractmethod
+from smart_injector import injectable
+from scanned.interfaces import Repository
+
+class UserRepository(Repository):
+    @abstractmethod
+    def users(self):
+        pass
+
+class OrderRepository(Repository):
+    @abstractmethod
+    def orders(self):
+        pass
+
+@injectable
+class SqlUsers(UserRepository):
+    def load(self):
+        pass
+
+    def users(self):
+        pass
+
+@injectable
+class SqlOrders(OrderRepository):
+    def load(self):
+        pass
+
+    def orders(self):
+        pass
+"""
+
+
+def test_scan_binds_interfaces_with_a_common_abstract_base(package):
+    (package / "impl" / "repository.py").write_text(LAYERED)
+    container = create_container(configure_scan)
+    from scanned.impl.repository import OrderRepository
+    from scanned.impl.repository import UserRepository
+
+    assert type(container.get(UserRepository)).__name__ == "SqlUsers"
+    assert type(container.get(OrderRepository)).__name__ == "SqlOrders"
+
+
+def test_scan_keeps_existing_bindings(package):
+    from scanned.interfaces import Repository
+
+    class FakeRepository(Repository):
+        def load(self):
+            pass
+
+    def configure(config: Config):
+        config.bind(Repository, FakeRepository)
+        configure_scan(config)
+
+    container = create_container(configure)
+    assert type(container.get(Repository)) is FakeRepository
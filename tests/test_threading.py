@@ -0,0 +1,114 @@
+import sys
+import threading
+import time
+from abc import ABC
+from abc import abstractmethod
+
+import pytest  # type: ignore
+
+from smart_injector import Config
+from smart_injector import Lifetime
+from smart_injector import create_container
+from smart_injector.config.backend import ConfigEntry
+from smart_injector.config.backend import ContextConfig
+
+THREADS = 8
+
+
+class Clock(ABC):
+    @abstractmethod
+    def now(self) -> float:
+        pass
+
+
+class SystemClock(Clock):
+    def now(self) -> float:
+        return time.time()
+
+
+class Settings:
+    def __init__(self, name: str):
+        self.name = name
+
+
+class Service:
+    def __init__(self, clock: Clock, settings: Settings):
+        self.clock = clock
+        self.settings = settings
+
+
+class Handler:
+    def __init__(self, service: Service, settings: Settings):
+        self.service = service
+        self.settings = settings
+
+
+def configure(config: Config):
+    config.bind(Clock, SystemClock)
+    config.lifetime(SystemClock, Lifetime.SINGLETON)
+    config.lifetime(Service, Lifetime.SINGLETON)
+    config.arguments(Settings, name="global")
+    config.arguments(Settings, name="handler", where=Handler)
+
+
+def run_threads(target, count):
+    barrier = threading.Barrier(count)
+    results = [None] * count
+    errors = []
+
+    def run(index):
+        barrier.wait()
+        try:
+            results[index] = target()
+        except Exception as e:  # pragma: no cover
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    return results
+
+
+def test_singletons_are_created_once_under_concurrent_resolution():
+    for _ in range(20):
+        container = create_container(configure)
+        handlers = run_threads(lambda: container.get(Handler), THREADS)
+        assert len({id(handler.service) for handler in handlers}) == 1
+        assert len({id(handler.service.clock) for handler in handlers}) == 1
+        assert all(handler.settings.name == "handler" for handler in handlers)
+        assert all(handler.service.settings.name == "global" for handler in handlers)
+
+
+def test_reading_config_does_not_insert_context_entries():
+    config = ContextConfig(lambda x: None)
+    config.freeze()
+    config.get(ConfigEntry(Service, Handler))
+    assert not config.is_defined_locally(ConfigEntry(Service, Handler))
+    assert config._with_context == {}
+
+
+def throughput(container, threads, calls=2000):
+    def resolve():
+        for _ in range(calls):
+            container.get(Handler)
+
+    start = time.perf_counter()
+    run_threads(resolve, threads)
+    return threads * calls / (time.perf_counter() - start)
+
+
+def test_throughput_scales_with_threads_without_gil():
+    container = create_container(configure)
+    single = throughput(container, 1)
+    multi = throughput(container, 4)
+    gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    if gil_enabled:
+        pytest.skip(
+            "throughput cannot scale with the GIL: {single:.0f} ops/s with 1 thread, {multi:.0f} ops/s with 4 threads".format(
+                single=single, multi=multi
+            )
+        )
+    assert multi > 2 * single